@@ -0,0 +1,189 @@
+import argparse
+import concurrent.futures
+import json
+import logging
+import math
+import os
+import sys
+import time
+from pathlib import Path
+
+base_dir = Path(__file__).absolute().parent
+src_dir = base_dir / "src"
+
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+from capture import capture_file, element_snapshot
+
+logger = logging.getLogger(__name__)
+
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+
+def project_kind(path: Path) -> str | None:
+    """Return "snapshot", "replay" or None, from the file's magic bytes."""
+    with open(path, "rb") as f:
+        magic = f.read(8)
+    if magic == element_snapshot.MAGIC:
+        return "snapshot"
+    if magic == capture_file.MAGIC:
+        return "replay"
+    return None
+
+
+def _run_snapshot(path: Path, threshold: float) -> tuple[int, dict[int, tuple[str, str]]]:
+    import capture
+
+    capture.install_offline_stubs()
+    import allocation
+
+    with capture.load_element_snapshot(str(path)) as snapshot:
+        source = allocation.SnapshotElementSource(snapshot)
+        registry = allocation.BuildingRegistry()
+        for building in source.buildings().values():
+            registry.upsert(building)
+        element_ids = source.element_ids()
+        allocation.StoreyAssignmentService(registry, threshold, source).assign_elements(element_ids)
+        return len(element_ids), dict(source.assignments)
+
+
+def _run_replay(path: Path, threshold: float) -> tuple[int, dict[int, tuple[str, str]]]:
+    import capture
+
+    backend = capture.install_replay(str(path))
+    import allocation
+    import element_controller
+
+    try:
+        registry = allocation.BuildingRegistry()
+        for building in allocation.build_building_storey_hierarchy().values():
+            registry.upsert(building)
+        element_ids = element_controller.get_all_identifiable_element_ids()
+        allocation.StoreyAssignmentService(registry, threshold).assign_elements(element_ids)
+        assignments: dict[int, tuple[str, str]] = {}
+        for _, function, args in backend.writes:
+            if function == "set_building_and_storey":
+                ids, building_name, storey_name = args
+                assignments.update((eid, (building_name, storey_name)) for eid in ids)
+        return len(element_ids), assignments
+    finally:
+        backend.close()
+
+
+def run_project(path: str, output_dir: str, threshold: float, log_level: int) -> dict:
+    """
+    Allocate one project in a fresh worker process and write its plan.
+
+    allocation is imported only after the cadwork stand-ins for this file are
+    installed, which is why every project needs its own process.
+    """
+    logging.basicConfig(level=log_level, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    project = Path(path)
+    kind = project_kind(project)
+    started = time.perf_counter()
+    if kind == "snapshot":
+        element_count, assignments = _run_snapshot(project, threshold)
+    elif kind == "replay":
+        element_count, assignments = _run_replay(project, threshold)
+    else:
+        raise ValueError(f"Neither an element snapshot nor a replay capture: {path!r}")
+    seconds = time.perf_counter() - started
+
+    plan: dict[str, dict[str, list[int]]] = {}
+    for eid, (building_name, storey_name) in sorted(assignments.items()):
+        plan.setdefault(building_name, {}).setdefault(storey_name, []).append(eid)
+
+    stats = {
+        "project": project.name,
+        "kind": kind,
+        "elements": element_count,
+        "assigned": len(assignments),
+        "seconds": seconds,
+        "elements_per_second": element_count / seconds if seconds > 0 else 0.0,
+    }
+    with open(Path(output_dir) / f"{project.stem}.plan.json", "w", encoding="utf-8") as f:
+        json.dump({**stats, "threshold": threshold, "plan": plan}, f, indent=1)
+    return stats
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile, p in [0, 100]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(results: list[dict], failures: dict[str, str], wall_seconds: float) -> dict:
+    latencies = [r["seconds"] for r in results]
+    elements = sum(r["elements"] for r in results)
+    return {
+        "projects": len(results),
+        "failed": failures,
+        "elements": elements,
+        "assigned": sum(r["assigned"] for r in results),
+        "wall_seconds": wall_seconds,
+        "elements_per_second": elements / wall_seconds if wall_seconds > 0 else 0.0,
+        "latency_p50_seconds": percentile(latencies, 50),
+        "latency_p95_seconds": percentile(latencies, 95),
+        "per_project": sorted(results, key=lambda r: r["project"]),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Allocate storeys for a directory of snapshot or replay files.")
+    parser.add_argument("directory", type=Path, help="directory with element snapshots and/or replay captures")
+    parser.add_argument("-o", "--output", type=Path, default=None, help="output directory (default: <directory>/plans)")
+    parser.add_argument("-t", "--threshold", type=float, default=0.6, help="coverage threshold")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--pattern", default="*", help="glob for project files inside directory")
+    parser.add_argument("--log-level", default="ERROR", type=str.upper, choices=LOG_LEVELS,
+                        help="log level inside the workers")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    output_dir: Path = args.output or args.directory / "plans"
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    projects = sorted(p for p in args.directory.glob(args.pattern) if p.is_file() and project_kind(p))
+    if not projects:
+        logger.error(f"No snapshot or replay files in {args.directory}")
+        return 1
+    logger.info(f"Allocating {len(projects)} projects with {args.workers} workers")
+
+    results: list[dict] = []
+    failures: dict[str, str] = {}
+    started = time.perf_counter()
+    # One project per worker process: replay installs module stand-ins process-wide
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers, max_tasks_per_child=1) as pool:
+        futures = {
+            pool.submit(run_project, str(p), str(output_dir), args.threshold, getattr(logging, args.log_level)): p
+            for p in projects
+        }
+        for future in concurrent.futures.as_completed(futures):
+            project = futures[future]
+            try:
+                stats = future.result()
+            except Exception as e:
+                logger.error(f"{project.name} failed: {e}")
+                failures[project.name] = str(e)
+                continue
+            logger.info(f"{stats['project']}: {stats['elements']} elements in {stats['seconds']:.2f}s "
+                        f"({stats['elements_per_second']:.0f} elements/s)")
+            results.append(stats)
+    wall_seconds = time.perf_counter() - started
+
+    summary = summarize(results, failures, wall_seconds)
+    with open(output_dir / "summary.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=1)
+    logger.info(f"{summary['projects']} projects, {summary['elements']} elements in {wall_seconds:.2f}s: "
+                f"{summary['elements_per_second']:.0f} elements/s, "
+                f"p50={summary['latency_p50_seconds']:.2f}s p95={summary['latency_p95_seconds']:.2f}s, "
+                f"{len(failures)} failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
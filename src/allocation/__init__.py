@@ -3,7 +3,15 @@ from .building_storey_builder import Building, BuildingStorey, build_building_st
 from .model_element_factory import ModelElementFactory, create_model_element
 from .storey_assignment_service import StoreyAssignmentService
 from .building_storey_boundary_creator import BuildingStoreyBoundaryCreator
-from .model_tree_builder import ModelElementTreeBuilder
+from .model_tree_builder import ModelElementTreeBuilder, ModelTreeIndex
+from .element_source import IElementSource, CadworkElementSource, SnapshotElementSource, export_element_snapshot
+from .async_element_source import AsyncElementSource
+from .allocation_cache import AllocationCache
+from .memory_profiler import MemoryBudget, MemoryProfiler, MemoryReport, profile_allocation
+from .threshold_sweep import CoverageSweep, SweepOutcome, TieBreakStrategy
+from .ambiguity_detector import AmbiguityDetector, AmbiguityReport, ElementRanking
+from .storey_watcher import Debouncer, IElementEventSource, FakeElementEventSource, PollingElementEventSource
+from .storey_watcher import StoreyWatcher, WatchStats
 
 __all__ = [
     "StoreyAssignmentService",
@@ -15,4 +23,27 @@ __all__ = [
     "create_model_element",
     "BuildingStoreyBoundaryCreator",
     "ModelElementTreeBuilder",
+    "ModelTreeIndex",
+    "IElementSource",
+    "CadworkElementSource",
+    "SnapshotElementSource",
+    "export_element_snapshot",
+    "AsyncElementSource",
+    "AllocationCache",
+    "MemoryBudget",
+    "MemoryProfiler",
+    "MemoryReport",
+    "profile_allocation",
+    "CoverageSweep",
+    "SweepOutcome",
+    "TieBreakStrategy",
+    "AmbiguityDetector",
+    "AmbiguityReport",
+    "ElementRanking",
+    "Debouncer",
+    "FakeElementEventSource",
+    "IElementEventSource",
+    "PollingElementEventSource",
+    "StoreyWatcher",
+    "WatchStats",
 ]
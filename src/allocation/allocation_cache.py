@@ -0,0 +1,143 @@
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import struct
+from collections import OrderedDict
+
+from allocation.building_storey_builder import Building
+from models.building_storey_boundary import DEFAULT_Z_TOLERANCE
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+_EXTENT = struct.Struct("<ddd")  # z_min, z_max, threshold
+
+# storey name (None if unassigned), coverage
+Decision = tuple[str | None, float]
+
+
+def building_fingerprint(building: Building, tolerance: float = DEFAULT_Z_TOLERANCE) -> str:
+    """Digest of the storey names and elevations that decide an allocation in building."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(struct.pack("<d", tolerance))
+    for storey in building.storeys:
+        digest.update(storey.storey_name.encode("utf-8") + b"\0")
+        digest.update(struct.pack("<d", storey.elevation))
+    return digest.hexdigest()
+
+
+def _parse_entries(entries) -> list[tuple[str, Decision]] | None:
+    """Validated [key, storey name, coverage] entries of a saved cache, or None if any is malformed."""
+    if not isinstance(entries, list):
+        return None
+    parsed: list[tuple[str, Decision]] = []
+    for entry in entries:
+        if not (isinstance(entry, list) and len(entry) == 3):
+            return None
+        key, storey_name, coverage = entry
+        if not isinstance(key, str) or not (storey_name is None or isinstance(storey_name, str)) \
+                or isinstance(coverage, bool) or not isinstance(coverage, (int, float)):
+            return None
+        parsed.append((key, (storey_name, float(coverage))))
+    return parsed
+
+
+@dataclasses.dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+class AllocationCache:
+    """
+    Content-addressed LRU cache of allocation decisions.
+
+    Keys combine an element's bbox z-extent, the building fingerprint and the
+    coverage threshold, so a decision is reused whenever all three are
+    unchanged, whatever else changed on the element. If path is given, the
+    cache is loaded from it and save() writes it back.
+    """
+
+    def __init__(self, max_entries: int = 200_000, path: str | None = None) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self._max_entries = max_entries
+        self._path = path
+        self._entries: OrderedDict[str, Decision] = OrderedDict()
+        self.stats = CacheStats()
+        if path and os.path.isfile(path):
+            self.load(path)
+
+    @staticmethod
+    def make_key(z_min: float, z_max: float, fingerprint: str, threshold: float) -> str:
+        digest = hashlib.blake2b(_EXTENT.pack(z_min, z_max, threshold), digest_size=16)
+        digest.update(fingerprint.encode("ascii"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Decision | None:
+        decision = self._entries.get(key)
+        if decision is None:
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return decision
+
+    def put(self, key: str, decision: Decision) -> None:
+        self._entries[key] = decision
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def load(self, path: str) -> None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable allocation cache {path!r}: {e}")
+            return
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            version = data.get("version") if isinstance(data, dict) else None
+            logger.warning(f"Ignoring allocation cache {path!r} with version {version!r}")
+            return
+        entries = _parse_entries(data.get("entries"))
+        if entries is None:
+            logger.warning(f"Ignoring malformed allocation cache {path!r}")
+            return
+        for key, decision in entries:
+            self.put(key, decision)
+        logger.info(f"Loaded {len(self._entries)} cached allocation decisions from {path}")
+
+    def save(self, path: str | None = None) -> None:
+        """Write the cache (least recently used first) to path, or to the path it was created with."""
+        path = path or self._path
+        if not path:
+            return
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": CACHE_VERSION,
+                "entries": [[key, storey_name, coverage] for key, (storey_name, coverage) in self._entries.items()],
+            }, f)
+        os.replace(tmp_path, path)
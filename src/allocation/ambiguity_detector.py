@@ -0,0 +1,106 @@
+import dataclasses
+import logging
+from typing import Iterable
+
+import numpy as np
+
+import models
+from allocation.building_registry import BuildingRegistry
+from allocation.building_storey_boundary_creator import BuildingStoreyBoundaryCreator
+from allocation.element_source import IElementSource, CadworkElementSource
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class StoreyCandidate:
+    storey_name: str
+    coverage: float
+
+
+@dataclasses.dataclass(frozen=True)
+class ElementRanking:
+    element_id: int
+    building_name: str
+    candidates: list[StoreyCandidate]  # best first, at most k
+    storeys_touched: int  # storeys with non-zero coverage
+    ambiguous: bool  # top two candidates within the margin
+    straddling: bool  # touches more than two storeys
+
+    def __str__(self) -> str:
+        ranked = ", ".join(f"{c.storey_name}={c.coverage:.1%}" for c in self.candidates)
+        flags = [name for name, flag in (("ambiguous", self.ambiguous), ("straddling", self.straddling)) if flag]
+        return f"Element {self.element_id} in {self.building_name} [{'/'.join(flags)}]: {ranked}"
+
+
+@dataclasses.dataclass
+class AmbiguityReport:
+    element_count: int
+    flagged: list[ElementRanking]
+
+    @property
+    def ambiguous(self) -> list[ElementRanking]:
+        return [r for r in self.flagged if r.ambiguous]
+
+    @property
+    def straddling(self) -> list[ElementRanking]:
+        return [r for r in self.flagged if r.straddling]
+
+
+class AmbiguityDetector:
+    """
+    Ranks the top-k storeys per element and building in one vectorized pass and
+    flags the elements a reviewer should look at:
+      - ambiguous: the best two storeys are within margin of each other
+        (exact ties are otherwise decided by boundary order)
+      - straddling: the element overlaps more than two storeys
+    """
+
+    def __init__(self, registry: BuildingRegistry, k: int = 3, margin: float = 0.05,
+                 source: IElementSource | None = None) -> None:
+        if k < 2:
+            raise ValueError("k must be >= 2 to compare the two best storeys")
+        if not (0.0 <= margin <= 1.0):
+            raise ValueError("margin must be in [0,1]")
+        self._registry = registry
+        self._k = k
+        self._margin = margin
+        self._source: IElementSource = source or CadworkElementSource()
+
+    def detect(self, element_ids: Iterable[int]) -> AmbiguityReport:
+        element_ids = list(element_ids)
+        z_min, z_max = self._source.bbox_z_extents(element_ids)
+
+        flagged: list[ElementRanking] = []
+        for building_name, building in self._registry.items():
+            boundaries = BuildingStoreyBoundaryCreator.from_building(building)
+            if not boundaries:
+                continue
+            index = models.StoreyIntervalIndex(boundaries)
+            coverage = index.coverage(z_min, z_max)
+            indices, values = models.top_k_coverage(coverage, self._k)
+
+            touched = (coverage > 0.0).sum(axis=1)
+            ambiguous = (values[:, 1] > 0.0) & (values[:, 0] - values[:, 1] <= self._margin)
+            straddling = touched > 2
+
+            for row in np.flatnonzero(ambiguous | straddling).tolist():
+                candidates = [
+                    StoreyCandidate(index.boundaries[i].storey_name, c)
+                    for i, c in zip(indices[row].tolist(), values[row].tolist()) if i >= 0 and c > 0.0
+                ]
+                flagged.append(ElementRanking(
+                    element_id=element_ids[row],
+                    building_name=building_name,
+                    candidates=candidates,
+                    storeys_touched=int(touched[row]),
+                    ambiguous=bool(ambiguous[row]),
+                    straddling=bool(straddling[row]),
+                ))
+
+        report = AmbiguityReport(len(element_ids), flagged)
+        logger.info(f"{len(report.ambiguous)} ambiguous and {len(report.straddling)} straddling "
+                    f"element/building pairs among {len(element_ids)} elements")
+        for ranking in flagged:
+            logger.warning(str(ranking))
+        return report
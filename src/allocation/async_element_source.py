@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Iterable, TypeVar
+
+import numpy as np
+
+from allocation.element_source import IElementSource, CadworkElementSource, read_z_extents
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class AsyncElementSource:
+    """
+    Async facade over an IElementSource.
+
+    Blocking calls run on a single worker thread so that the cadwork API is never
+    entered concurrently, while the event loop stays free for other tasks.
+    Cancelling an awaiting task abandons the result; the call that is already
+    running on the worker finishes in the background.
+    """
+
+    def __init__(self, source: IElementSource | None = None, executor: Executor | None = None) -> None:
+        self._source: IElementSource = source or CadworkElementSource()
+        self._owns_executor = executor is None
+        self._executor: Executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="cadwork-api")
+
+    @property
+    def source(self) -> IElementSource:
+        return self._source
+
+    async def call(self, function: Callable[..., T], *args) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, function, *args)
+
+    async def read_chunk(self, element_ids: list[int]) -> tuple[list[int], np.ndarray, np.ndarray]:
+        """Read the bbox z-extents of a chunk; elements that fail to load are skipped."""
+        return await self.call(read_z_extents, self._source, element_ids)
+
+    async def set_building_and_storey(self, element_ids: list[int], building_name: str, storey_name: str) -> None:
+        await self.call(self._source.set_building_and_storey, element_ids, building_name, storey_name)
+
+    def close(self) -> None:
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self) -> "AsyncElementSource":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def chunked(element_ids: Iterable[int], chunk_size: int) -> Iterable[list[int]]:
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+    chunk: list[int] = []
+    for eid in element_ids:
+        chunk.append(eid)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -10,22 +10,24 @@ class BuildingStoreyBoundaryCreator:
     """Factory/service to create BuildingStoreyBoundary instances."""
 
     @staticmethod
-    def from_frames(identifier: str, bottom_frame: "Frame", top_frame: "Frame") -> BuildingStoreyBoundary:
+    def from_frames(identifier: str, bottom_frame: "Frame", top_frame: "Frame",
+                    storey_name: str | None = None) -> BuildingStoreyBoundary:
         BuildingStoreyBoundaryCreator._validate_frames(bottom_frame, top_frame)
-        return BuildingStoreyBoundary(identifier, bottom_frame, top_frame)
+        return BuildingStoreyBoundary(identifier, bottom_frame, top_frame, storey_name)
 
     @staticmethod
     def from_building(building: Building) -> list[BuildingStoreyBoundary]:
         storeys = building.storeys
-        # frame low z is storey elevation frame top z is next storey elevation
+        # frame low z is storey elevation frame top z is next storey elevation;
+        # the highest storey is open upwards (top frame at +inf)
         boundaries = []
-        for i in range(len(storeys) - 1):
-            bottom_storey = storeys[i]
-            top_storey = storeys[i + 1]
+        for i, bottom_storey in enumerate(storeys):
+            top_z = storeys[i + 1].elevation if i + 1 < len(storeys) else math.inf
             bottom_frame = Frame([0, 0, bottom_storey.elevation], [1, 0, 0], [0, 1, 0])
-            top_frame = Frame([0, 0, top_storey.elevation], [1, 0, 0], [0, 1, 0])
+            top_frame = Frame([0, 0, top_z], [1, 0, 0], [0, 1, 0])
             identifier = f"{building.name}_{bottom_storey.storey_name}"
-            boundary = BuildingStoreyBoundaryCreator.from_frames(identifier, bottom_frame, top_frame)
+            boundary = BuildingStoreyBoundaryCreator.from_frames(identifier, bottom_frame, top_frame,
+                                                                 bottom_storey.storey_name)
             boundaries.append(boundary)
 
         return boundaries
@@ -0,0 +1,293 @@
+import abc
+import logging
+from typing import Iterable
+
+import attribute_controller as ac
+import bim_controller as bc
+import cadwork
+import element_controller as ec
+import geometry_controller as gc
+import numpy as np
+from compas.geometry import Point, Vector
+
+import models
+from allocation.building_storey_builder import Building, BuildingStorey, build_building_storey_hierarchy
+from capture.element_snapshot import NO_STRING, ElementSnapshot, SnapshotRow, write_element_snapshot
+from models.aabb import corner_z_extents
+from models.model_element import ElementKind
+
+logger = logging.getLogger(__name__)
+
+
+class IElementSource(abc.ABC):
+    """Per-element data the allocator reads, and the assignment it writes back."""
+
+    @abc.abstractmethod
+    def kind(self, element_id: int) -> ElementKind:
+        pass
+
+    @abc.abstractmethod
+    def group_key(self, element_id: int) -> str:
+        pass
+
+    @abc.abstractmethod
+    def guid(self, element_id: int) -> str:
+        pass
+
+    @abc.abstractmethod
+    def name(self, element_id: int) -> str:
+        pass
+
+    @abc.abstractmethod
+    def geometry(self, element_id: int) -> models.ModelElementGeometry:
+        pass
+
+    @abc.abstractmethod
+    def bbox_points(self, element_id: int) -> list[Point]:
+        pass
+
+    def bbox_z_extents(self, element_ids: Iterable[int]) -> tuple[np.ndarray, np.ndarray]:
+        """Per-element (z_min, z_max) arrays of the local bbox, in element_ids order."""
+        extents = []
+        for eid in element_ids:
+            zs = [p.z for p in self.bbox_points(eid)]
+            extents.append((min(zs), max(zs)))
+        z = np.array(extents, dtype=float).reshape(-1, 2)
+        return z[:, 0], z[:, 1]
+
+    @abc.abstractmethod
+    def building(self, element_id: int) -> str | None:
+        pass
+
+    @abc.abstractmethod
+    def storey(self, element_id: int) -> str | None:
+        pass
+
+    def building_names(self, element_ids: Iterable[int]) -> list[str | None]:
+        """
+        Building name per element id. The default asks building() per id; cadwork
+        has no bulk call for this, so only sources such as snapshots batch it.
+        """
+        return [self.building(eid) for eid in element_ids]
+
+    @abc.abstractmethod
+    def element_from_guid(self, guid: str) -> int:
+        pass
+
+    @abc.abstractmethod
+    def buildings(self) -> dict[str, Building]:
+        pass
+
+    @abc.abstractmethod
+    def set_building_and_storey(self, element_ids: list[int], building_name: str, storey_name: str) -> None:
+        pass
+
+
+class CadworkElementSource(IElementSource):
+    """Reads from and writes to the running cadwork session."""
+
+    def kind(self, element_id: int) -> ElementKind:
+        if ac.is_wall(element_id):
+            return ElementKind.WALL
+        if ac.is_floor(element_id):
+            return ElementKind.SLAB
+        if ac.is_roof(element_id):
+            return ElementKind.ROOF
+        if ac.is_container(element_id):
+            return ElementKind.CONTAINER
+        return ElementKind.LEAF
+
+    def group_key(self, element_id: int) -> str:
+        if ac.get_element_grouping_type() == cadwork.element_grouping_type.subgroup:
+            return ac.get_subgroup(element_id) or ""
+        return ac.get_group(element_id) or ""
+
+    def guid(self, element_id: int) -> str:
+        return ec.get_element_cadwork_guid(element_id)
+
+    def name(self, element_id: int) -> str:
+        return ac.get_name(element_id)
+
+    def geometry(self, element_id: int) -> models.ModelElementGeometry:
+        return models.ModelElementGeometry(
+            self._to_point(gc.get_p1(element_id)),
+            self._to_vector(gc.get_xl(element_id)),
+            self._to_vector(gc.get_yl(element_id)),
+            self._to_vector(gc.get_zl(element_id)),
+            self.bbox_points(element_id),
+        )
+
+    def bbox_points(self, element_id: int) -> list[Point]:
+        return [self._to_point(v) for v in ec.get_bounding_box_vertices_local(element_id, [element_id])]
+
+    def building(self, element_id: int) -> str | None:
+        return bc.get_building(element_id) or None
+
+    def storey(self, element_id: int) -> str | None:
+        return bc.get_storey(element_id) or None
+
+    def element_from_guid(self, guid: str) -> int:
+        return ec.get_element_from_cadwork_guid(guid)
+
+    def buildings(self) -> dict[str, Building]:
+        return build_building_storey_hierarchy()
+
+    def set_building_and_storey(self, element_ids: list[int], building_name: str, storey_name: str) -> None:
+        bc.set_building_and_storey(element_ids, building_name, storey_name)
+
+    @staticmethod
+    def _to_point(p3: cadwork.point_3d) -> Point:
+        return Point(p3.x, p3.y, p3.z)
+
+    @staticmethod
+    def _to_vector(vec3: cadwork.point_3d) -> Vector:
+        return Vector(vec3.x, vec3.y, vec3.z)
+
+
+class SnapshotElementSource(IElementSource):
+    """
+    Serves element data from a memory-mapped ElementSnapshot.
+
+    Writes are not persisted; they are collected in ``assignments``
+    (element id -> (building, storey)) and shadow the snapshot on later reads.
+    """
+
+    def __init__(self, snapshot: ElementSnapshot):
+        self._snapshot = snapshot
+        self._guid_to_id: dict[str, int] | None = None
+        self.assignments: dict[int, tuple[str, str]] = {}
+
+    @property
+    def snapshot(self) -> ElementSnapshot:
+        return self._snapshot
+
+    def element_ids(self) -> list[int]:
+        return self._snapshot.element_ids.tolist()
+
+    def kind(self, element_id: int) -> ElementKind:
+        return ElementKind(int(self._snapshot.kinds[self._snapshot.row(element_id)]))
+
+    def group_key(self, element_id: int) -> str:
+        return self._snapshot.string(int(self._snapshot.group_keys[self._snapshot.row(element_id)])) or ""
+
+    def guid(self, element_id: int) -> str:
+        return self._snapshot.guid(self._snapshot.row(element_id))
+
+    def name(self, element_id: int) -> str:
+        return self._snapshot.string(int(self._snapshot.names[self._snapshot.row(element_id)])) or ""
+
+    def geometry(self, element_id: int) -> models.ModelElementGeometry:
+        row = self._snapshot.row(element_id)
+        x, y, z = self._snapshot.axes[row].tolist()
+        return models.ModelElementGeometry(
+            Point(*self._snapshot.p1[row].tolist()),
+            Vector(*x),
+            Vector(*y),
+            Vector(*z),
+            self.bbox_points(element_id),
+        )
+
+    def bbox_points(self, element_id: int) -> list[Point]:
+        return [Point(*c) for c in self._snapshot.bbox[self._snapshot.row(element_id)].tolist()]
+
+    def bbox_z_extents(self, element_ids: Iterable[int]) -> tuple[np.ndarray, np.ndarray]:
+        rows = np.fromiter((self._snapshot.row(eid) for eid in element_ids), dtype=np.int64)
+        return corner_z_extents(self._snapshot.bbox[rows])
+
+    def building(self, element_id: int) -> str | None:
+        if element_id in self.assignments:
+            return self.assignments[element_id][0]
+        try:
+            return self._snapshot.string(int(self._snapshot.buildings[self._snapshot.row(element_id)]))
+        except KeyError:
+            return None
+
+    def building_names(self, element_ids: Iterable[int]) -> list[str | None]:
+        element_ids = list(element_ids)
+        rows = self._snapshot.rows(element_ids)
+        indices = np.full(len(rows), NO_STRING, dtype=np.int64)
+        known = rows >= 0
+        indices[known] = self._snapshot.buildings[rows[known]]
+        names = [self._snapshot.string(idx) for idx in indices.tolist()]
+        if self.assignments:
+            names = [self.assignments[eid][0] if eid in self.assignments else name
+                     for eid, name in zip(element_ids, names)]
+        return names
+
+    def storey(self, element_id: int) -> str | None:
+        if element_id in self.assignments:
+            return self.assignments[element_id][1]
+        try:
+            return self._snapshot.string(int(self._snapshot.storeys[self._snapshot.row(element_id)]))
+        except KeyError:
+            return None
+
+    def element_from_guid(self, guid: str) -> int:
+        if self._guid_to_id is None:
+            self._guid_to_id = {self._snapshot.guid(row): int(eid)
+                                for row, eid in enumerate(self._snapshot.element_ids.tolist())}
+        return self._guid_to_id.get(str(models.Guid(guid).value), 0)
+
+    def buildings(self) -> dict[str, Building]:
+        return {
+            name: Building(name=name, storeys=[BuildingStorey(name, storey, elevation) for storey, elevation in storeys])
+            for name, storeys in self._snapshot.building_storeys.items()
+        }
+
+    def set_building_and_storey(self, element_ids: list[int], building_name: str, storey_name: str) -> None:
+        for eid in element_ids:
+            self.assignments[eid] = (building_name, storey_name)
+
+
+def read_z_extents(source: IElementSource, element_ids: list[int]) -> tuple[list[int], np.ndarray, np.ndarray]:
+    """
+    Bbox z-extents of element_ids in one bbox_z_extents call. If that fails (e.g.
+    an element was deleted), elements are read one by one and failing ones are
+    skipped; returns (loaded ids, z_min, z_max).
+    """
+    try:
+        z_min, z_max = source.bbox_z_extents(element_ids)
+        return list(element_ids), z_min, z_max
+    except Exception:
+        pass
+    loaded: list[int] = []
+    extents: list[tuple[float, float]] = []
+    for eid in element_ids:
+        try:
+            z_min, z_max = source.bbox_z_extents([eid])
+        except Exception as e:
+            logger.warning(f"Failed to read element id={eid}: {e}")
+            continue
+        loaded.append(eid)
+        extents.append((float(z_min[0]), float(z_max[0])))
+    z = np.array(extents, dtype=float).reshape(-1, 2)
+    return loaded, z[:, 0], z[:, 1]
+
+
+def export_element_snapshot(path: str, element_ids: Iterable[int], source: IElementSource | None = None) -> int:
+    """Write the allocator's per-element data for element_ids to a snapshot file."""
+    source = source or CadworkElementSource()
+
+    def rows() -> Iterable[SnapshotRow]:
+        for eid in element_ids:
+            geometry = source.geometry(eid)
+            yield SnapshotRow(
+                element_id=eid,
+                guid=source.guid(eid),
+                kind=source.kind(eid).value,
+                group_key=source.group_key(eid),
+                name=source.name(eid),
+                p1=list(geometry.local_origin()),
+                axes=[list(geometry.local_x_direction()),
+                      list(geometry.local_y_direction()),
+                      list(geometry.local_z_direction())],
+                bbox=[list(p) for p in source.bbox_points(eid)],
+                building=source.building(eid),
+                storey=source.storey(eid),
+            )
+
+    buildings = {
+        name: [(s.storey_name, s.elevation) for s in building.storeys]
+        for name, building in source.buildings().items()
+    }
+    return write_element_snapshot(path, rows(), buildings)
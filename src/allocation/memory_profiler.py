@@ -0,0 +1,200 @@
+import contextlib
+import dataclasses
+import gc
+import logging
+import sys
+import tracemalloc
+from typing import Iterable, Iterator
+
+from compas.geometry import Point, Vector
+
+import models
+from allocation.building_registry import BuildingRegistry
+from allocation.element_source import IElementSource, CadworkElementSource
+from allocation.model_element_factory import ModelElementFactory
+from allocation.model_tree_builder import ModelElementTreeBuilder
+from allocation.storey_assignment_service import StoreyAssignmentService
+
+logger = logging.getLogger(__name__)
+
+STAGE_TREE_BUILDING = "tree building"
+STAGE_ELEMENT_CREATION = "element creation"
+STAGE_ASSIGNMENT = "assignment"
+
+# Object types broken down in every stage
+TRACKED_TYPES: dict[str, type] = {
+    "compas Point": Point,
+    "compas Vector": Vector,
+    "ModelElementGeometry": models.ModelElementGeometry,
+    "Guid": models.Guid,
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class TypeMemory:
+    count: int  # live objects created during the stage
+    size: int  # approximate bytes: object plus its __dict__
+
+
+@dataclasses.dataclass(frozen=True)
+class StageMemory:
+    name: str
+    retained: int  # bytes still allocated when the stage ended
+    peak: int  # highest allocation during the stage, relative to its start
+    by_type: dict[str, TypeMemory]
+
+
+class MemoryBudgetExceeded(AssertionError):
+    pass
+
+
+@dataclasses.dataclass(frozen=True)
+class MemoryBudget:
+    """Upper bound of peak bytes per element for one stage."""
+    stage: str
+    peak_per_element: int
+
+
+# tests/test_memory_budgets.py measures 2.3-2.9 KiB peak per element on a
+# snapshot; the budgets leave headroom for platform differences but fail on a
+# doubling of the footprint.
+DEFAULT_BUDGETS: tuple[MemoryBudget, ...] = (
+    MemoryBudget(STAGE_TREE_BUILDING, 6 * 1024),
+    MemoryBudget(STAGE_ELEMENT_CREATION, 6 * 1024),
+    MemoryBudget(STAGE_ASSIGNMENT, 6 * 1024),
+)
+
+
+def _object_size(obj: object) -> int:
+    size = sys.getsizeof(obj)
+    attrs = getattr(obj, "__dict__", None)
+    return size + sys.getsizeof(attrs) if attrs is not None else size
+
+
+def _live_objects(types: dict[str, type]) -> dict[str, dict[int, object]]:
+    names = {tp: name for name, tp in types.items()}
+    live: dict[str, dict[int, object]] = {name: {} for name in types}
+    for obj in gc.get_objects():
+        name = names.get(type(obj))
+        if name is not None:
+            live[name][id(obj)] = obj
+    return live
+
+
+class MemoryProfiler:
+    """
+    Opt-in tracemalloc profiler that records per-stage memory use.
+
+    Each stage reports the bytes it retained and its peak, relative to the
+    stage start, plus live objects of TRACKED_TYPES created in it. Counting
+    objects walks the gc heap, so only use this for diagnostics.
+    """
+
+    def __init__(self, enabled: bool = True, types: dict[str, type] | None = None) -> None:
+        self.enabled = enabled
+        self._types = types or TRACKED_TYPES
+        self.stages: list[StageMemory] = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        gc.collect()
+        before = {name: set(objs) for name, objs in _live_objects(self._types).items()}
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            by_type: dict[str, TypeMemory] = {}
+            for type_name, objs in _live_objects(self._types).items():
+                created = [obj for i, obj in objs.items() if i not in before[type_name]]
+                by_type[type_name] = TypeMemory(len(created), sum(_object_size(obj) for obj in created))
+            if started_tracing:
+                tracemalloc.stop()
+            self.stages.append(StageMemory(name, current - baseline, peak - baseline, by_type))
+
+    def report(self) -> "MemoryReport":
+        return MemoryReport(list(self.stages))
+
+
+@dataclasses.dataclass
+class MemoryReport:
+    stages: list[StageMemory]
+    element_count: int = 0
+
+    @property
+    def peak(self) -> int:
+        return max((s.peak for s in self.stages), default=0)
+
+    def stage(self, name: str) -> StageMemory:
+        for s in self.stages:
+            if s.name == name:
+                return s
+        raise KeyError(f"No stage named {name!r}")
+
+    def format(self) -> str:
+        n = max(self.element_count, 1)
+        lines = [f"Memory profile for {self.element_count} elements (overall peak {self.peak / 2**20:.1f} MiB)"]
+        for s in self.stages:
+            lines.append(f"  {s.name}: peak={s.peak / 2**20:.1f} MiB ({s.peak // n} B/element), "
+                         f"retained={s.retained / 2**20:.1f} MiB")
+            for type_name, tm in s.by_type.items():
+                if tm.count:
+                    lines.append(f"    {type_name}: {tm.count} objects, ~{tm.size / 2**20:.1f} MiB")
+        return "\n".join(lines)
+
+    def budget_violations(self, budgets: Iterable[MemoryBudget] = DEFAULT_BUDGETS) -> list[str]:
+        n = max(self.element_count, 1)
+        violations = []
+        for budget in budgets:
+            try:
+                s = self.stage(budget.stage)
+            except KeyError:
+                continue
+            per_element = s.peak / n
+            if per_element > budget.peak_per_element:
+                violations.append(f"{s.name}: {per_element:.0f} B/element peak exceeds "
+                                  f"budget of {budget.peak_per_element} B/element")
+        return violations
+
+    def check_budgets(self, budgets: Iterable[MemoryBudget] = DEFAULT_BUDGETS) -> None:
+        """Raise MemoryBudgetExceeded if any stage is over its per-element budget."""
+        violations = self.budget_violations(budgets)
+        if violations:
+            raise MemoryBudgetExceeded("; ".join(violations))
+
+
+def profile_allocation(registry: BuildingRegistry, element_ids: Iterable[int],
+                       source: IElementSource | None = None, coverage_threshold: float = 0.60) -> MemoryReport:
+    """
+    Run tree building, element creation and assignment as separate profiled stages.
+
+    Created elements are kept alive until the end of their stage, so the
+    breakdown shows the full per-element footprint.
+    """
+    source = source or CadworkElementSource()
+    element_ids = list(element_ids)
+    profiler = MemoryProfiler()
+
+    with profiler.stage(STAGE_TREE_BUILDING):
+        trees = ModelElementTreeBuilder(element_ids, source).build()
+    del trees
+
+    with profiler.stage(STAGE_ELEMENT_CREATION):
+        elements = [ModelElementFactory.create(eid, source) for eid in element_ids]
+    del elements
+
+    with profiler.stage(STAGE_ASSIGNMENT):
+        StoreyAssignmentService(registry, coverage_threshold, source).assign_elements(element_ids)
+
+    report = profiler.report()
+    report.element_count = len(element_ids)
+    logger.info(report.format())
+    return report
@@ -5,6 +5,7 @@ import geometry_controller as gc
 from compas.geometry import Point, Vector
 
 import models
+from allocation.element_source import IElementSource
 from models.model_element import ModelLeafElement, IModelElement
 from models.model_element_geometry import ModelElementGeometry
 
@@ -20,8 +21,15 @@ class ModelElementFactory:
         return Point(p3.x, p3.y, p3.z)
 
     @classmethod
-    def create(cls, element_id: int) -> IModelElement:
-        """Create a ModelElement from an element id."""
+    def create(cls, element_id: int, source: IElementSource | None = None) -> IModelElement:
+        """Create a ModelElement from an element id, read from source if given."""
+        if source is not None:
+            return ModelLeafElement(
+                models.Guid(source.guid(element_id)),
+                source.name(element_id),
+                source.geometry(element_id),
+            )
+
         bbx_vertices = ec.get_bounding_box_vertices_local(element_id, [element_id])
         bbx_pts = [cls.to_point(v) for v in bbx_vertices]
 
@@ -55,5 +63,5 @@ def to_point(point3d: cadwork.point_3d) -> Point:
     return ModelElementFactory.to_point(point3d)
 
 
-def create_model_element(element_id: int) -> IModelElement:
-    return ModelElementFactory.create(element_id)
+def create_model_element(element_id: int, source: IElementSource | None = None) -> IModelElement:
+    return ModelElementFactory.create(element_id, source)
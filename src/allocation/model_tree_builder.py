@@ -1,108 +1,249 @@
-from typing import Iterable, Dict, List, Tuple, Callable
+import functools
+import json
+import logging
+import os
+from typing import Callable, Iterable, Dict, List, Tuple
 
-import attribute_controller as ac
-import cadwork
-import element_controller as ec
-import geometry_controller as gc
 from compas.geometry import Point, Vector
 
 import models
+from allocation.element_source import IElementSource, CadworkElementSource
+from models.model_element import ElementKind
 
+logger = logging.getLogger(__name__)
 
-def _classify(ids: Iterable[int]) -> Tuple[List[int], List[int]]:
-    parents, leaves = [], []
-    for i in ids:
-        if ac.is_wall(i) or ac.is_floor(i) or ac.is_roof(i) or ac.is_container(i):
-            parents.append(i)
-        else:
-            leaves.append(i)
-    return parents, leaves
+ORPHANS_NAME = "Orphans"
 
 
-grouping_by: Callable[[int], str] = lambda x: ac.get_subgroup(x) \
-    if ac.get_element_grouping_type() == cadwork.element_grouping_type.subgroup \
-    else lambda y: ac.get_group(y)
+class ModelTreeIndex:
+    """
+    Classification of elements as parent or leaf and their group key, plus the
+    derived group key -> parent ids index. Can be persisted between sessions so
+    that unchanged elements need not be classified again.
 
+    Element ids are only valid within a cadwork session, so every entry also
+    stores the element's guid; entries of a loaded index whose guid no longer
+    matches are dropped by validate().
+    """
 
-def _group_children(leaf_ids: Iterable[int]) -> Dict[str, List[int]]:
-    groups: Dict[str, List[int]] = {}
-    for i in leaf_ids:
-        subgroup = grouping_by(i) or ""
-        groups.setdefault(subgroup, []).append(i)
-    return groups
+    VERSION = 2
+
+    def __init__(self) -> None:
+        self._elements: Dict[int, Tuple[bool, str, str]] = {}  # element id -> (is parent, group key, guid)
+        self._group_parents: Dict[str, List[int]] | None = None
+
+    def __contains__(self, element_id: int) -> bool:
+        return element_id in self._elements
+
+    def __len__(self) -> int:
+        return len(self._elements)
+
+    def update(self, element_id: int, is_parent: bool, group_key: str, guid: str) -> None:
+        self._elements[element_id] = (is_parent, group_key, guid)
+        self._group_parents = None
+
+    def discard(self, element_id: int) -> None:
+        if self._elements.pop(element_id, None) is not None:
+            self._group_parents = None
+
+    def is_parent(self, element_id: int) -> bool:
+        return self._elements[element_id][0]
+
+    def group_key(self, element_id: int) -> str:
+        return self._elements[element_id][1]
+
+    def guid(self, element_id: int) -> str:
+        return self._elements[element_id][2]
+
+    def validate(self, element_ids: Iterable[int], guid_of: Callable[[int], str]) -> int:
+        """Drop entries of element_ids whose stored guid differs from guid_of(id); return how many."""
+        stale = [eid for eid in element_ids if eid in self._elements and self.guid(eid) != guid_of(eid)]
+        for eid in stale:
+            self.discard(eid)
+        return len(stale)
+
+    def group_parents(self) -> Dict[str, List[int]]:
+        """Group key -> parent element ids, in insertion order."""
+        if self._group_parents is None:
+            groups: Dict[str, List[int]] = {}
+            for eid, (is_parent, group_key, _) in self._elements.items():
+                if is_parent:
+                    groups.setdefault(group_key, []).append(eid)
+            self._group_parents = groups
+        return self._group_parents
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": self.VERSION,
+                "elements": [[eid, is_parent, group_key, guid]
+                             for eid, (is_parent, group_key, guid) in self._elements.items()],
+                "group_parents": self.group_parents(),
+            }, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ModelTreeIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != cls.VERSION:
+            raise ValueError(f"Unsupported model tree index version {data.get('version')!r} in {path!r}")
+        index = cls()
+        for eid, is_parent, group_key, guid in data["elements"]:
+            index.update(int(eid), bool(is_parent), group_key, guid)
+        return index
 
 
 class ModelElementTreeBuilder:
-    def __init__(self, element_ids: Iterable[int]):
+    """
+    Builds one subtree per parent element (wall, slab, roof, container) holding
+    the leaves of the same group, plus an "Orphans" container for the rest.
+
+    The builder remembers what it built: rebuild() reclassifies only changed
+    elements and reuses every subtree whose parent, children and group are
+    unchanged.
+    """
+
+    def __init__(self, element_ids: Iterable[int], source: IElementSource | None = None,
+                 index: ModelTreeIndex | None = None):
         self._all_ids: List[int] = list(element_ids)
+        self._source: IElementSource = source or CadworkElementSource()
+        self._index: ModelTreeIndex = index if index is not None else ModelTreeIndex()
+        self._validated = index is None  # a given index may come from an earlier session
+        self._leaves: Dict[int, models.ModelLeafElement] = {}
+        self._subtrees: Dict[int, Tuple[Tuple[int, ...], models.IModelElement]] = {}
+        self._node_ids: Dict[str, int] = {}  # guid of a built subtree root -> element id
+
+    @property
+    def index(self) -> ModelTreeIndex:
+        return self._index
+
+    def element_ids_of(self, nodes: Iterable[models.IModelElement]) -> list[int | None]:
+        """Element ids of subtree roots built by this builder; None for synthetic containers."""
+        return [self._node_ids.get(node.guid.value) for node in nodes]
 
     def build(self) -> list[models.IModelElement]:
-        parents, leaves = _classify(self._all_ids)
-        subgroup_to_children = _group_children(leaves)
+        """Build all subtrees from scratch (classification in a loaded index is reused)."""
+        self._leaves.clear()
+        self._subtrees.clear()
+        self._node_ids.clear()
+        return self._build(changed=set())
+
+    def rebuild(self, changed_ids: Iterable[int] = (), element_ids: Iterable[int] | None = None
+                ) -> list[models.IModelElement]:
+        """
+        Rebuild after edits to changed_ids, optionally with a new set of element_ids
+        (added and removed elements count as changed).
+        """
+        changed = set(changed_ids)
+        if element_ids is not None:
+            new_ids = list(element_ids)
+            changed.update(set(self._all_ids).difference(new_ids))
+            self._all_ids = new_ids
+        for eid in changed:
+            self._index.discard(eid)
+            self._leaves.pop(eid, None)
+            # drop the subtree of a former parent, also if it has turned into a leaf
+            cached = self._subtrees.pop(eid, None)
+            if cached is not None:
+                self._node_ids.pop(cached[1].guid.value, None)
+        return self._build(changed)
+
+    def _build(self, changed: set[int]) -> list[models.IModelElement]:
+        self._classify()
+        # The index may hold elements outside this build (e.g. loaded from a session in
+        # which more elements existed); only parents being built can adopt leaves
+        parent_groups = {self._index.group_key(eid) for eid in self._all_ids if self._index.is_parent(eid)}
+        subgroup_to_children: Dict[str, List[int]] = {}
+        for eid in self._all_ids:
+            if not self._index.is_parent(eid):
+                subgroup_to_children.setdefault(self._index.group_key(eid), []).append(eid)
 
         composites: list[models.IModelElement] = []
-        for pid in parents:
-            subgroup = grouping_by(pid) or ""
-            children_ids = subgroup_to_children.get(subgroup, [])
-            parent_el = self._create_typed_parent(pid, [self._create_leaf_element(cid) for cid in children_ids])
+        reused = 0
+        for pid in self._all_ids:
+            if not self._index.is_parent(pid):
+                continue
+            children_ids = tuple(subgroup_to_children.get(self._index.group_key(pid), ()))
+            cached = self._subtrees.get(pid)
+            if cached is not None and pid not in changed and cached[0] == children_ids \
+                    and changed.isdisjoint(children_ids):
+                composites.append(cached[1])
+                reused += 1
+                continue
+            parent_el = self._create_typed_parent(pid, [self._leaf(cid) for cid in children_ids])
+            self._subtrees[pid] = (children_ids, parent_el)
+            self._node_ids[parent_el.guid.value] = pid
             composites.append(parent_el)
 
         # attach orphan leaves (no parent by subgroup) under a generic container
-        orphans = self._collect_orphans(leaves, subgroup_to_children, set(grouping_by(p) or "" for p in parents))
+        orphans = self._collect_orphans(self._all_ids, subgroup_to_children, parent_groups)
         if orphans:
             container = models.ModelNodeElement(
-                guid=models.create_guid(),  # stable but arbitrary
-                name="Orphans",
+                guid=models.derive_guid(ORPHANS_NAME),
+                name=ORPHANS_NAME,
                 geometry=self._empty_geometry(),
-                children=[self._create_leaf_element(i) for i in orphans],
+                children=[self._leaf(i) for i in orphans],
             )
             composites.append(container)
 
+        logger.debug(f"Model tree: {len(composites)} subtrees, {reused} reused, {len(orphans)} orphans")
         return composites
 
+    def _classify(self) -> None:
+        if not self._validated:
+            stale = self._index.validate(self._all_ids, self._source.guid)
+            if stale:
+                logger.info(f"Model tree index: reclassifying {stale} elements whose guid changed")
+            self._validated = True
+        for eid in self._all_ids:
+            if eid not in self._index:
+                is_parent = self._source.kind(eid) is not ElementKind.LEAF
+                self._index.update(eid, is_parent, self._source.group_key(eid), self._source.guid(eid))
+
     @staticmethod
-    def _collect_orphans(leaf_ids: Iterable[int], groups: Dict[str, List[int]], parent_groups: set[str]) -> set[int]:
-        orphans: set[int] = set()
+    def _collect_orphans(element_ids: Iterable[int], groups: Dict[str, List[int]],
+                         parent_groups: set[str]) -> list[int]:
+        orphans: list[int] = []
         for subgroup, ids in groups.items():
             if subgroup not in parent_groups:
-                orphans.update(ids)
-        return orphans
+                orphans.extend(ids)
+        return sorted(orphans)
+
+    def _leaf(self, element_id: int) -> models.ModelLeafElement:
+        leaf = self._leaves.get(element_id)
+        if leaf is None:
+            leaf = self._create_leaf_element(element_id)
+            self._leaves[element_id] = leaf
+        return leaf
 
     def _create_typed_parent(self, parent_id: int, children: list[models.IModelElement]) -> models.IModelElement:
-        guid = models.Guid(ec.get_element_cadwork_guid(parent_id))
-        name = ac.get_name(parent_id)
-        geom = self._create_element_geometry(parent_id)
-        if ac.is_wall(parent_id):
+        guid = models.Guid(self._source.guid(parent_id))
+        name = self._source.name(parent_id)
+        geom = self._source.geometry(parent_id)
+        kind = self._source.kind(parent_id)
+        if kind is ElementKind.WALL:
             return models.Wall(guid, name, geom, children)
-        if ac.is_floor(parent_id):
+        if kind is ElementKind.SLAB:
             return models.Slab(guid, name, geom, children)
-        if ac.is_roof(parent_id):
+        if kind is ElementKind.ROOF:
             return models.Roof(guid, name, geom, children)
-        if ac.is_container(parent_id):
+        if kind is ElementKind.CONTAINER:
             return models.Container(guid, name, geom, children)
         # Fallback
         return models.ModelNodeElement(guid, name, geom, children)
 
     def _create_leaf_element(self, element_id: int) -> models.ModelLeafElement:
-        guid = models.Guid(ec.get_element_cadwork_guid(element_id))
-        name = ac.get_name(element_id)
-        geom = self._create_element_geometry(element_id)
+        guid = models.Guid(self._source.guid(element_id))
+        name = self._source.name(element_id)
+        geom = self._source.geometry(element_id)
         return models.ModelLeafElement(guid, name, geom)
 
     @staticmethod
-    def _create_element_geometry(element_id: int) -> models.ModelElementGeometry:
-        bbx_vertices = ec.get_bounding_box_vertices_local(element_id, [element_id])
-        bbx_pts = [Point(v.x, v.y, v.z) for v in bbx_vertices]
-        return models.ModelElementGeometry(
-            Point(gc.get_p1(element_id).x, gc.get_p1(element_id).y, gc.get_p1(element_id).z),
-            Vector(gc.get_xl(element_id).x, gc.get_xl(element_id).y, gc.get_xl(element_id).z),
-            Vector(gc.get_yl(element_id).x, gc.get_yl(element_id).y, gc.get_yl(element_id).z),
-            Vector(gc.get_zl(element_id).x, gc.get_zl(element_id).y, gc.get_zl(element_id).z),
-            bbx_pts,
-        )
-
-    @staticmethod
+    @functools.cache
     def _empty_geometry() -> models.ModelElementGeometry:
+        # Built once and shared; synthetic containers never modify their geometry
         origin = Point(0, 0, 0)
         x = Vector(1, 0, 0)
         y = Vector(0, 1, 0)
@@ -112,5 +253,5 @@ class ModelElementTreeBuilder:
 
 
 # Convenience function
-def build_model_tree(element_ids: Iterable[int]) -> list[models.IModelElement]:
-    return ModelElementTreeBuilder(element_ids).build()
+def build_model_tree(element_ids: Iterable[int], source: IElementSource | None = None) -> list[models.IModelElement]:
+    return ModelElementTreeBuilder(element_ids, source).build()
@@ -1,105 +1,179 @@
+import asyncio
 import logging
 from typing import Iterable
 
-import bim_controller as bc
-import element_controller as ec
-from bim_controller import set_building_and_storey
+import numpy as np
 from compas.geometry import Point
 
 import allocation
 import models
 from allocation.building_registry import BuildingRegistry
+from allocation.allocation_cache import AllocationCache, Decision, building_fingerprint
+from allocation.async_element_source import AsyncElementSource, chunked
 from allocation.building_storey_boundary_creator import BuildingStoreyBoundaryCreator
+from allocation.element_source import IElementSource, CadworkElementSource, read_z_extents
 from allocation.model_element_factory import ModelElementFactory
 from models.building_storey_boundary import BuildingStoreyBoundary
 
 logger = logging.getLogger(__name__)
 
 
-def build_model_element_trees(element_ids: Iterable[int]) -> list[models.IModelElement]:
-    tree_builder = allocation.ModelElementTreeBuilder(element_ids)
+def build_model_element_trees(element_ids: Iterable[int],
+                              source: IElementSource | None = None) -> list[models.IModelElement]:
+    tree_builder = allocation.ModelElementTreeBuilder(element_ids, source)
     return tree_builder.build()
 
 
-def map_model_element_trees_to_buildings(model_element_trees: list[models.IModelElement]) -> dict[
-    str, models.IModelElement]:
-    buildings_to_nodes: dict[str, models.IModelElement] = {}
-    for node in model_element_trees:
-        element_id: int = ec.get_element_from_cadwork_guid(node.guid.value)
-        building_name: str = bc.get_building(element_id) or "UnassignedBuilding"
-        buildings_to_nodes.setdefault(building_name, node)
+def map_model_element_trees_to_buildings(model_element_trees: list[models.IModelElement],
+                                         source: IElementSource | None = None,
+                                         element_ids: list[int | None] | None = None
+                                         ) -> dict[str, list[models.IModelElement]]:
+    """
+    Group tree nodes by the building of their root element.
+
+    element_ids holds the element id of each node (None for synthetic nodes), as
+    returned by ModelElementTreeBuilder.element_ids_of, which saves the guid
+    lookup per node; building names come from source.building_names (one call
+    per element for cadwork, vectorized for snapshots). Without element_ids the
+    ids are looked up from the node guids.
+    """
+    source = source or CadworkElementSource()
+    if element_ids is None:
+        element_ids = [source.element_from_guid(node.guid.value) for node in model_element_trees]
+    if len(element_ids) != len(model_element_trees):
+        raise ValueError("element_ids must have one entry per tree node")
+
+    known = [eid for eid in element_ids if eid is not None]
+    names = iter(source.building_names(known))
+    buildings_to_nodes: dict[str, list[models.IModelElement]] = {}
+    for node, element_id in zip(model_element_trees, element_ids):
+        building_name = (next(names) if element_id is not None else None) or "UnassignedBuilding"
+        buildings_to_nodes.setdefault(building_name, []).append(node)
 
     return buildings_to_nodes
 
 
+def build_interval_indexes(registry: BuildingRegistry) -> list[tuple[str, models.StoreyIntervalIndex]]:
+    """StoreyIntervalIndex per registered building, in registry order; buildings without boundaries are skipped."""
+    indexes: list[tuple[str, models.StoreyIntervalIndex]] = []
+    for building_name, building in registry.items():
+        boundaries = BuildingStoreyBoundaryCreator.from_building(building)
+        if not boundaries:
+            logger.warning(f"No boundaries for building {building_name}")
+            continue
+        indexes.append((building_name, models.StoreyIntervalIndex(boundaries)))
+    return indexes
+
+
+def plan_assignments(indexes: list[tuple[str, models.StoreyIntervalIndex]], element_ids: list[int],
+                     z_min: np.ndarray, z_max: np.ndarray, coverage_threshold: float
+                     ) -> list[tuple[str, str, list[int]]]:
+    """
+    Vectorized storey choice for element_ids with the given z-extents.
+
+    Returns (building name, storey name, element ids) batches in index order;
+    each element goes to its best covering storey per building if that
+    coverage reaches coverage_threshold.
+    """
+    batches: list[tuple[str, str, list[int]]] = []
+    for building_name, index in indexes:
+        coverage = index.coverage(z_min, z_max)
+        best = coverage.argmax(axis=1)
+        best_coverage = coverage[np.arange(len(element_ids)), best]
+        accepted = (best_coverage >= coverage_threshold) & (best_coverage > 0.0)
+        logger.debug(f"{building_name}: {int(accepted.sum())}/{len(element_ids)} elements assigned")
+        to_assign: dict[str, list[int]] = {}
+        for i in np.flatnonzero(accepted).tolist():
+            to_assign.setdefault(index.boundaries[best[i]].storey_name, []).append(element_ids[i])
+        batches.extend((building_name, storey_name, ids) for storey_name, ids in to_assign.items())
+    return batches
+
+
 class StoreyAssignmentService:
     """
     Service that:
       - Builds boundaries for each registered building
       - Checks element bbox against boundaries
       - Assigns the element to the first storey with >= threshold coverage
+      - Reuses decisions from an optional AllocationCache
       - Logs decisions
     """
 
-    def __init__(self, registry: BuildingRegistry, coverage_threshold: float = 0.60) -> None:
+    def __init__(self, registry: BuildingRegistry, coverage_threshold: float = 0.60,
+                 source: IElementSource | None = None, cache: AllocationCache | None = None) -> None:
         if not (0.0 <= coverage_threshold <= 1.0):
             raise ValueError("coverage_threshold must be in [0,1]")
         self._registry = registry
         self._coverage_threshold = coverage_threshold
+        self._source: IElementSource = source or CadworkElementSource()
+        self._cache = cache
 
     def assign_elements(self, element_ids: Iterable[int]) -> None:
         """
         Assign each element in element_ids to a storey if its local bbox overlaps
         at least coverage_threshold fraction with a storey boundary.
         """
+        element_ids = list(element_ids)
+        hits_before, misses_before = (self._cache.stats.hits, self._cache.stats.misses) if self._cache else (0, 0)
 
-        model_element_trees = build_model_element_trees(element_ids)
-        building_tree_nodes = map_model_element_trees_to_buildings(model_element_trees)
+        # z-extents are all a decision depends on, so they are read first and in bulk
+        loaded, z_mins, z_maxs = read_z_extents(self._source, element_ids)
+        extents = list(zip(loaded, z_mins.tolist(), z_maxs.tolist()))
 
+        buildings: list[tuple[str, models.StoreyIntervalIndex, str, list[Decision | None]]] = []
         for building_name, building in self._registry.items():
-            logger.info(f"Processing building: {building_name}")
-
             # Create storey boundaries (one per vertical span)
             boundaries: list[BuildingStoreyBoundary] = BuildingStoreyBoundaryCreator.from_building(building)
             if not boundaries:
                 logger.warning(f"No boundaries for building {building_name}")
                 continue
+            index = models.StoreyIntervalIndex(boundaries)
+            fingerprint = building_fingerprint(building, index.tolerance)
+            cached: list[Decision | None] = [None] * len(extents)
+            if self._cache is not None:
+                cached = [
+                    self._cache.get(AllocationCache.make_key(z_min, z_max, fingerprint, self._coverage_threshold))
+                    for _, z_min, z_max in extents
+                ]
+            buildings.append((building_name, index, fingerprint, cached))
 
-            # Pre-log boundaries
-            for b in boundaries:
-                bz0, bz1 = b.z_range()
-                logger.debug(f"Boundary {b.identifier}: z_range=({bz0:.3f}, {bz1:.3f}), height={b.height():.3f}")
-
-            to_assign: dict[str, list[int]] = {}  # storey_name -> element ids
-
-            for eid in element_ids:
+        # Model elements and the tree are only needed for elements without a cached decision
+        uncached = [eid for i, (eid, _, _) in enumerate(extents) if any(c[i] is None for *_, c in buildings)]
+        failed: set[int] = set()
+        if uncached:
+            tree_builder = allocation.ModelElementTreeBuilder(uncached, self._source)
+            model_element_trees = tree_builder.build()
+            building_tree_nodes = map_model_element_trees_to_buildings(
+                model_element_trees, self._source, tree_builder.element_ids_of(model_element_trees)
+            )
+            for eid in uncached:
                 try:
-                    me = ModelElementFactory.create(eid)
+                    ModelElementFactory.create(eid, self._source)
                 except Exception as e:
                     logger.exception(f"Failed to create model element for id={eid}: {e}")
-                    continue
+                    failed.add(eid)
 
-                # Get bbox points (compas Points) from geometry (we stored them in the BoundingBox)
-                # We reconstruct from local bbox vertices again to avoid exposing internals
-                try:
-                    bbx_vertices = ec.get_bounding_box_vertices_local(eid, [eid])
-                    bbox_pts = [ModelElementFactory.to_point(v) for v in bbx_vertices]
-                except Exception as e:
-                    logger.exception(f"Failed to get bbox for id={eid}: {e}")
-                    continue
+        for building_name, index, fingerprint, cached in buildings:
+            logger.info(f"Processing building: {building_name}")
 
-                chosen_storey = None
-                chosen_coverage = 0.0
+            # Pre-log boundaries
+            for b in index.boundaries:
+                bz0, bz1 = b.z_range()
+                logger.debug(f"Boundary {b.identifier}: z_range=({bz0:.3f}, {bz1:.3f}), height={b.height():.3f}")
 
-                # Evaluate coverage for each boundary
-                for boundary in boundaries:
-                    covered = self._vertical_coverage(boundary, bbox_pts)
-                    logger.debug(
-                        f"Element {eid} vs {boundary.identifier}: coverage={covered:.3%}"
-                    )
-                    if covered > chosen_coverage:
-                        chosen_storey = boundary.identifier.split("_", 1)[-1]  # "<building>_<storey>"
-                        chosen_coverage = covered
+            to_assign: dict[str, list[int]] = {}  # storey_name -> element ids
+
+            for (eid, z_min, z_max), decision in zip(extents, cached):
+                if decision is None:
+                    if eid in failed:
+                        continue
+                    decision = self._choose_storey(eid, index, z_min, z_max)
+                    if self._cache is not None:
+                        key = AllocationCache.make_key(z_min, z_max, fingerprint, self._coverage_threshold)
+                        self._cache.put(key, decision)
+                else:
+                    logger.debug(f"Element {eid}: cached decision storey={decision[0]}")
+                chosen_storey, chosen_coverage = decision
 
                 if chosen_storey and chosen_coverage >= self._coverage_threshold:
                     to_assign.setdefault(chosen_storey, []).append(eid)
@@ -117,25 +191,104 @@ class StoreyAssignmentService:
             for storey_name, eids in to_assign.items():
                 try:
                     logger.info(f"Setting {len(eids)} elements to {building_name}/{storey_name}")
-                    set_building_and_storey(eids, building_name, storey_name)
+                    self._source.set_building_and_storey(eids, building_name, storey_name)
                 except Exception as e:
                     logger.exception(
                         f"Failed assigning {len(eids)} elements to {building_name}/{storey_name}: {e}"
                     )
 
+        if self._cache is not None:
+            hits = self._cache.stats.hits - hits_before
+            misses = self._cache.stats.misses - misses_before
+            hit_rate = hits / (hits + misses) if hits + misses else 0.0
+            logger.info(f"Allocation cache: {hits} hits, {misses} misses (hit rate {hit_rate:.1%})")
+            self._cache.save()
+
+    def _choose_storey(self, eid: int, index: models.StoreyIntervalIndex, z_min: float, z_max: float) -> Decision:
+        """Return (storey name, coverage) of the best covering storey; storey is None if nothing overlaps."""
+        chosen_storey = None
+        chosen_coverage = 0.0
+
+        z_low, z_high = index.snap(np.array([z_min, z_max])).tolist()
+        if z_high - z_low <= index.tolerance:
+            # Flat element: point-in-interval lookup instead of coverage per boundary
+            located = int(index.locate(0.5 * (z_low + z_high)))
+            if located >= 0:
+                chosen_storey = index.boundaries[located].storey_name
+                chosen_coverage = 1.0
+            logger.debug(f"Element {eid} is flat at z={z_low:.3f}: storey={chosen_storey}")
+            return chosen_storey, chosen_coverage
+
+        # Evaluate coverage for each boundary
+        for boundary in index.boundaries:
+            covered = boundary.coverage(z_min, z_max)
+            logger.debug(
+                f"Element {eid} vs {boundary.identifier}: coverage={covered:.3%}"
+            )
+            if covered > chosen_coverage:
+                chosen_storey = boundary.storey_name
+                chosen_coverage = covered
+        return chosen_storey, chosen_coverage
+
+    async def assign_elements_async(self, element_ids: Iterable[int], chunk_size: int = 256,
+                                    max_pending_chunks: int = 2,
+                                    gateway: AsyncElementSource | None = None) -> None:
+        """
+        Async variant of assign_elements that pipelines reads, coverage and writes.
+
+        Element data is read chunk by chunk on the gateway's worker thread while
+        the previous chunk is evaluated; bounded queues of max_pending_chunks
+        limit how far reads run ahead. Assignments are written per chunk and
+        building in registry order, so the end result matches assign_elements.
+        Cancelling the awaiting task stops all three stages.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        if max_pending_chunks < 1:
+            raise ValueError("max_pending_chunks must be >= 1")
+
+        indexes = build_interval_indexes(self._registry)
+        owns_gateway = gateway is None
+        gateway = gateway or AsyncElementSource(self._source)
+        read_queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending_chunks)
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending_chunks)
+
+        async def read() -> None:
+            for chunk in chunked(element_ids, chunk_size):
+                await read_queue.put(await gateway.read_chunk(chunk))
+            await read_queue.put(None)
+
+        async def evaluate() -> None:
+            while (item := await read_queue.get()) is not None:
+                eids, z_min, z_max = item
+                await write_queue.put(plan_assignments(indexes, eids, z_min, z_max, self._coverage_threshold))
+            await write_queue.put(None)
+
+        async def write() -> None:
+            while (batches := await write_queue.get()) is not None:
+                for building_name, storey_name, eids in batches:
+                    try:
+                        logger.info(f"Setting {len(eids)} elements to {building_name}/{storey_name}")
+                        await gateway.set_building_and_storey(eids, building_name, storey_name)
+                    except Exception as e:
+                        logger.exception(
+                            f"Failed assigning {len(eids)} elements to {building_name}/{storey_name}: {e}"
+                        )
+
+        try:
+            async with asyncio.TaskGroup() as tasks:
+                tasks.create_task(read())
+                tasks.create_task(evaluate())
+                tasks.create_task(write())
+        finally:
+            if owns_gateway:
+                gateway.close()
+
     @staticmethod
     def _vertical_coverage(boundary: BuildingStoreyBoundary, bbox_points: Iterable[Point]) -> float:
-        """Return fraction of bbox height overlapped by boundary along Z."""
+        """Return fraction of bbox height overlapped by boundary along Z, within the boundary tolerance."""
         zs = [p.z for p in bbox_points]
-        z_min, z_max = min(zs), max(zs)
-        if z_max <= z_min:
-            return 0.0
-
-        b_min, b_max = boundary.z_range()
-        overlap_low = max(z_min, b_min)
-        overlap_high = min(z_max, b_max)
-        overlap = max(0.0, overlap_high - overlap_low)
-        return overlap / (z_max - z_min)
+        return boundary.coverage(min(zs), max(zs))
 
     @staticmethod
     def _create_node_elements(element_ids: Iterable[int]) -> list[int]:
@@ -0,0 +1,261 @@
+import abc
+import dataclasses
+import logging
+import math
+import threading
+import time
+from typing import Callable, Iterable
+
+import element_controller as ec
+import numpy as np
+
+from allocation.building_registry import BuildingRegistry
+from allocation.element_source import IElementSource, CadworkElementSource, read_z_extents
+from allocation.storey_assignment_service import build_interval_indexes, plan_assignments
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUDGET = 0.1  # seconds per re-allocated batch, including the polls that detected it
+DEFAULT_SCAN_INTERVAL = 2.0  # seconds between full model scans of PollingElementEventSource
+
+
+class IElementEventSource(abc.ABC):
+    """Ids of elements modified since the previous poll."""
+
+    @abc.abstractmethod
+    def poll(self) -> set[int]:
+        """Return the ids modified since the last call, without blocking."""
+        pass
+
+
+class FakeElementEventSource(IElementEventSource):
+    """Event source fed by hand, e.g. from a test or a replayed editing session."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: set[int] = set()
+
+    def emit(self, element_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._pending.update(element_ids)
+
+    def poll(self) -> set[int]:
+        with self._lock:
+            changed, self._pending = self._pending, set()
+        return changed
+
+
+class PollingElementEventSource(IElementEventSource):
+    """
+    Detects modified elements by comparing bbox z-extents between polls.
+
+    The z-extent is all the allocation depends on, so elements whose extent is
+    unchanged are not reported. New elements are reported, removed ones are
+    forgotten. The first scan only records the baseline.
+
+    A scan reads the extents of every element, one API call each on a live
+    model, so the model is scanned at most every scan_interval seconds however
+    often poll() is called; polls in between return no ids.
+    """
+
+    def __init__(self, source: IElementSource | None = None,
+                 element_ids: Callable[[], Iterable[int]] | None = None,
+                 scan_interval: float = DEFAULT_SCAN_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        if scan_interval < 0.0:
+            raise ValueError("scan_interval must be >= 0")
+        self._source: IElementSource = source or CadworkElementSource()
+        self._element_ids = element_ids or ec.get_all_identifiable_element_ids
+        self._scan_interval = scan_interval
+        self._clock = clock
+        self._scanned_at = -math.inf
+        self._ids: np.ndarray | None = None  # sorted ids of the previous scan
+        self._extents: np.ndarray = np.empty((0, 2), dtype=float)
+
+    def poll(self) -> set[int]:
+        now = self._clock()
+        if now - self._scanned_at < self._scan_interval:
+            return set()
+        self._scanned_at = now
+        # Elements whose extents cannot be read (e.g. deleted mid-scan) are forgotten like removed ones
+        loaded, z_min, z_max = read_z_extents(self._source, sorted(set(self._element_ids())))
+        ids = np.array(loaded, dtype=np.int64)
+        extents = np.column_stack([z_min, z_max]) if len(ids) else np.empty((0, 2), dtype=float)
+
+        previous_ids, previous_extents = self._ids, self._extents
+        self._ids, self._extents = ids, extents
+        if previous_ids is None:
+            return set()
+
+        pos = np.clip(np.searchsorted(previous_ids, ids), 0, max(len(previous_ids) - 1, 0))
+        known = (previous_ids[pos] == ids) if len(previous_ids) else np.zeros(len(ids), dtype=bool)
+        changed = ~known
+        changed[known] = np.any(previous_extents[pos[known]] != extents[known], axis=1)
+        return set(ids[changed].tolist())
+
+
+class Debouncer:
+    """
+    Collects element ids from bursts of edits.
+
+    A batch is due once no new ids arrived for quiet_period seconds, or at the
+    latest max_delay seconds after its first id, so that continuous editing
+    still gets periodic updates.
+    """
+
+    def __init__(self, quiet_period: float = 0.05, max_delay: float = 0.25,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        if quiet_period < 0.0 or max_delay < quiet_period:
+            raise ValueError("Expected 0 <= quiet_period <= max_delay")
+        self._quiet_period = quiet_period
+        self._max_delay = max_delay
+        self._clock = clock
+        self._pending: set[int] = set()
+        self._first_at = 0.0
+        self._last_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, element_ids: Iterable[int], now: float | None = None) -> None:
+        element_ids = set(element_ids)
+        if not element_ids:
+            return
+        now = self._clock() if now is None else now
+        if not self._pending:
+            self._first_at = now
+        self._last_at = now
+        self._pending.update(element_ids)
+
+    def deadline(self) -> float:
+        """Clock time at which the pending batch becomes due; inf if nothing is pending."""
+        if not self._pending:
+            return math.inf
+        return min(self._last_at + self._quiet_period, self._first_at + self._max_delay)
+
+    def take(self, now: float | None = None, force: bool = False) -> list[int]:
+        """Return and clear the pending ids (sorted) if the batch is due or force is set, else []."""
+        now = self._clock() if now is None else now
+        if not self._pending or (not force and now < self.deadline()):
+            return []
+        batch, self._pending = sorted(self._pending), set()
+        return batch
+
+
+@dataclasses.dataclass(frozen=True)
+class WatchBatch:
+    elements: int  # ids in the batch
+    assigned: int  # elements written to a storey in at least one building
+    poll_seconds: float  # time spent in the polls that reported the batch's ids
+    seconds: float  # poll_seconds plus read, evaluate and write time of the batch
+
+
+@dataclasses.dataclass
+class WatchStats:
+    batches: list[WatchBatch] = dataclasses.field(default_factory=list)
+    polls: int = 0
+    poll_seconds: float = 0.0  # all polls, including those that reported nothing
+    max_poll_seconds: float = 0.0  # the longest the watch loop was blocked in a poll
+
+    @property
+    def elements(self) -> int:
+        return sum(b.elements for b in self.batches)
+
+    @property
+    def over_budget(self) -> int:
+        return sum(1 for b in self.batches if b.seconds > LATENCY_BUDGET)
+
+    def latency(self, p: float) -> float:
+        """Nearest-rank percentile of the batch latencies, p in [0, 100]."""
+        if not self.batches:
+            return 0.0
+        ordered = sorted(b.seconds for b in self.batches)
+        return ordered[max(1, math.ceil(p / 100.0 * len(ordered))) - 1]
+
+
+class StoreyWatcher:
+    """
+    Watch mode: re-allocates only the elements reported by an event source.
+
+    Storey interval indexes are built once from the registry (call
+    refresh_registry() after storeys change), so a batch costs one extent read
+    of its elements, one vectorized coverage pass and the batched writes.
+    Batch latency includes the time of the polls that reported its ids;
+    batches slower than LATENCY_BUDGET are logged as warnings.
+    """
+
+    def __init__(self, registry: BuildingRegistry, events: IElementEventSource,
+                 source: IElementSource | None = None, coverage_threshold: float = 0.60,
+                 debouncer: Debouncer | None = None, poll_interval: float = 0.02) -> None:
+        if not (0.0 <= coverage_threshold <= 1.0):
+            raise ValueError("coverage_threshold must be in [0,1]")
+        if poll_interval <= 0.0:
+            raise ValueError("poll_interval must be > 0")
+        self._registry = registry
+        self._events = events
+        self._source: IElementSource = source or CadworkElementSource()
+        self._coverage_threshold = coverage_threshold
+        self._debouncer = debouncer if debouncer is not None else Debouncer()
+        self._poll_interval = poll_interval
+        self._indexes = build_interval_indexes(registry)
+        self._pending_poll_seconds = 0.0
+        self.stats = WatchStats()
+
+    def refresh_registry(self) -> None:
+        self._indexes = build_interval_indexes(self._registry)
+
+    def step(self, now: float | None = None, flush: bool = False) -> WatchBatch | None:
+        """Poll once and re-allocate the debounced batch if it is due (or flush is set)."""
+        started = time.perf_counter()
+        changed = self._events.poll()
+        poll_seconds = time.perf_counter() - started
+        self.stats.polls += 1
+        self.stats.poll_seconds += poll_seconds
+        self.stats.max_poll_seconds = max(self.stats.max_poll_seconds, poll_seconds)
+        if changed:
+            self._pending_poll_seconds += poll_seconds
+            self._debouncer.add(changed, now)
+
+        batch = self._debouncer.take(now, force=flush)
+        if not batch:
+            return None
+        poll_seconds, self._pending_poll_seconds = self._pending_poll_seconds, 0.0
+        return self.reallocate(batch, poll_seconds)
+
+    def run(self, stop: threading.Event | None = None, duration: float | None = None) -> WatchStats:
+        """Watch until stop is set or duration seconds have passed; pending edits are flushed on exit."""
+        stop = stop or threading.Event()
+        ends_at = time.monotonic() + duration if duration is not None else math.inf
+        logger.info(f"Watching for element changes (threshold={self._coverage_threshold:.3%})")
+        while not stop.is_set() and time.monotonic() < ends_at:
+            self.step()
+            stop.wait(self._poll_interval)
+        self.step(flush=True)
+        logger.info(f"Watch stopped: {len(self.stats.batches)} batches, {self.stats.elements} elements, "
+                    f"p95={self.stats.latency(95) * 1000:.1f} ms, {self.stats.over_budget} over budget, "
+                    f"longest poll {self.stats.max_poll_seconds * 1000:.1f} ms")
+        return self.stats
+
+    def reallocate(self, element_ids: list[int], poll_seconds: float = 0.0) -> WatchBatch:
+        """Re-allocate element_ids; poll_seconds is the detection time to count in the batch latency."""
+        started = time.perf_counter()
+        loaded, z_min, z_max = read_z_extents(self._source, element_ids)
+        assigned: set[int] = set()
+        for building_name, storey_name, eids in plan_assignments(self._indexes, loaded, z_min, z_max,
+                                                                 self._coverage_threshold):
+            try:
+                self._source.set_building_and_storey(eids, building_name, storey_name)
+                assigned.update(eids)
+            except Exception as e:
+                logger.exception(f"Failed assigning {len(eids)} elements to {building_name}/{storey_name}: {e}")
+        seconds = poll_seconds + time.perf_counter() - started
+        batch = WatchBatch(len(element_ids), len(assigned), poll_seconds, seconds)
+        self.stats.batches.append(batch)
+
+        message = (f"Re-allocated {batch.elements} changed elements in {batch.seconds * 1000:.1f} ms "
+                   f"({batch.poll_seconds * 1000:.1f} ms polling)")
+        if batch.seconds > LATENCY_BUDGET:
+            logger.warning(f"{message} (budget {LATENCY_BUDGET * 1000:.0f} ms)")
+        else:
+            logger.info(message)
+        return batch
@@ -0,0 +1,140 @@
+import dataclasses
+import logging
+from enum import Enum, auto
+from typing import Iterable
+
+import numpy as np
+
+import models
+from allocation.building_registry import BuildingRegistry
+from allocation.building_storey_boundary_creator import BuildingStoreyBoundaryCreator
+from allocation.element_source import IElementSource, CadworkElementSource
+
+logger = logging.getLogger(__name__)
+
+UNASSIGNED = -1
+
+
+class TieBreakStrategy(Enum):
+    HIGHEST_COVERAGE = auto()  # storey with the largest coverage, lowest storey on ties
+    LOWEST_STOREY = auto()  # lowest storey reaching the threshold
+    BOTTOM_ANCHORED = auto()  # storey containing the element bottom, if it reaches the threshold
+
+
+@dataclasses.dataclass(frozen=True)
+class SweepOutcome:
+    threshold: float
+    strategy: TieBreakStrategy
+    assigned: int
+    unassigned: int
+    moved: int  # assigned to a different building/storey than today
+    added: int  # unassigned today but assigned under this setting
+    dropped: int  # assigned today but unassigned under this setting
+
+    def __str__(self) -> str:
+        return (f"thr={self.threshold:.3f} {self.strategy.name}: assigned={self.assigned} "
+                f"unassigned={self.unassigned} moved={self.moved} added={self.added} dropped={self.dropped}")
+
+
+@dataclasses.dataclass
+class _BuildingCoverage:
+    name: str
+    storey_names: list[str]
+    coverage: np.ndarray  # (N, S)
+    bottom_storey: np.ndarray  # (N,) index of the storey containing z_min, or UNASSIGNED
+
+
+class CoverageSweep:
+    """
+    Evaluates coverage thresholds and tie-break strategies on a coverage matrix
+    computed once per building. Nothing is written back to the source.
+
+    Decisions mirror StoreyAssignmentService: buildings are processed in registry
+    order and an element assigned in several buildings keeps the last one.
+    """
+
+    def __init__(self, registry: BuildingRegistry, element_ids: Iterable[int],
+                 source: IElementSource | None = None) -> None:
+        self._source: IElementSource = source or CadworkElementSource()
+        self._element_ids: list[int] = list(element_ids)
+        z_min, z_max = self._source.bbox_z_extents(self._element_ids)
+
+        self._buildings: list[_BuildingCoverage] = []
+        for building_name, building in registry.items():
+            boundaries = BuildingStoreyBoundaryCreator.from_building(building)
+            if not boundaries:
+                logger.warning(f"No boundaries for building {building_name}")
+                continue
+            index = models.StoreyIntervalIndex(boundaries)
+            self._buildings.append(_BuildingCoverage(
+                name=building_name,
+                storey_names=[b.storey_name for b in index.boundaries],
+                coverage=index.coverage(z_min, z_max),
+                bottom_storey=index.locate(index.snap(z_min)),
+            ))
+
+        self._current: list[tuple[str | None, str | None]] = [
+            (self._source.building(eid), self._source.storey(eid)) for eid in self._element_ids
+        ]
+
+    @property
+    def element_ids(self) -> list[int]:
+        return self._element_ids
+
+    @staticmethod
+    def _choose(data: _BuildingCoverage, threshold: float, strategy: TieBreakStrategy) -> np.ndarray:
+        """Chosen storey index per element, or UNASSIGNED."""
+        coverage = data.coverage
+        rows = np.arange(coverage.shape[0])
+        passing = (coverage >= threshold) & (coverage > 0.0)
+
+        if strategy is TieBreakStrategy.HIGHEST_COVERAGE:
+            chosen = coverage.argmax(axis=1)
+        elif strategy is TieBreakStrategy.LOWEST_STOREY:
+            chosen = passing.argmax(axis=1)
+        elif strategy is TieBreakStrategy.BOTTOM_ANCHORED:
+            chosen = np.clip(data.bottom_storey, 0, None)
+            passing = passing & (data.bottom_storey >= 0)[:, None]
+        else:
+            raise ValueError(f"Unknown strategy: {strategy}")
+
+        return np.where(passing[rows, chosen], chosen, UNASSIGNED)
+
+    def decisions(self, threshold: float,
+                  strategy: TieBreakStrategy = TieBreakStrategy.HIGHEST_COVERAGE) -> list[tuple[str, str] | None]:
+        """(building, storey) per element in element_ids order, or None if unassigned."""
+        if not (0.0 <= threshold <= 1.0):
+            raise ValueError("threshold must be in [0,1]")
+
+        result: list[tuple[str, str] | None] = [None] * len(self._element_ids)
+        for data in self._buildings:
+            chosen = self._choose(data, threshold, strategy)
+            for i in np.flatnonzero(chosen != UNASSIGNED).tolist():
+                result[i] = (data.name, data.storey_names[chosen[i]])
+        return result
+
+    def evaluate(self, threshold: float,
+                 strategy: TieBreakStrategy = TieBreakStrategy.HIGHEST_COVERAGE) -> SweepOutcome:
+        decisions = self.decisions(threshold, strategy)
+        assigned = moved = added = dropped = 0
+        for decision, (building, storey) in zip(decisions, self._current):
+            if decision is None:
+                dropped += storey is not None
+                continue
+            assigned += 1
+            if storey is None:
+                added += 1
+            else:
+                moved += decision != (building, storey)
+        return SweepOutcome(threshold, strategy, assigned, len(decisions) - assigned, moved, added, dropped)
+
+    def sweep(self, thresholds: Iterable[float],
+              strategies: Iterable[TieBreakStrategy] = tuple(TieBreakStrategy)) -> list[SweepOutcome]:
+        strategies = list(strategies)
+        outcomes = []
+        for threshold in thresholds:
+            for strategy in strategies:
+                outcome = self.evaluate(threshold, strategy)
+                logger.info(f"Sweep {outcome}")
+                outcomes.append(outcome)
+        return outcomes
@@ -0,0 +1,19 @@
+from .capture_file import CaptureReader, CaptureWriter, Point3D
+from .recorder import SessionRecorder, install_recorder
+from .replay import ReplayBackend, install_offline_stubs, install_replay
+from .element_snapshot import ElementSnapshot, SnapshotRow, load_element_snapshot, write_element_snapshot
+
+__all__ = [
+    "CaptureReader",
+    "CaptureWriter",
+    "Point3D",
+    "SessionRecorder",
+    "install_recorder",
+    "ReplayBackend",
+    "install_replay",
+    "install_offline_stubs",
+    "ElementSnapshot",
+    "SnapshotRow",
+    "load_element_snapshot",
+    "write_element_snapshot",
+]
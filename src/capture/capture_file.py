@@ -0,0 +1,247 @@
+import logging
+import mmap
+import struct
+from typing import Any, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CWCAP001"
+
+_RECORD_HEADER = struct.Struct("<II")  # key length, value length
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_POINT = struct.Struct("<ddd")
+
+EnumResolver = Callable[[str, str], Any]
+
+
+class Point3D:
+    """Stand-in for ``cadwork.point_3d`` when values are served from a capture."""
+
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x: float, y: float, z: float):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def __repr__(self) -> str:
+        return f"Point3D({self.x}, {self.y}, {self.z})"
+
+
+class CapturedEnum:
+    """Enum value whose type is not known to the replay backend."""
+
+    __slots__ = ("type_name", "name")
+
+    def __init__(self, type_name: str, name: str):
+        self.type_name = type_name
+        self.name = name
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CapturedEnum):
+            return NotImplemented
+        return (self.type_name, self.name) == (other.type_name, other.name)
+
+    def __hash__(self) -> int:
+        return hash((self.type_name, self.name))
+
+
+def _is_point(value: Any) -> bool:
+    return hasattr(value, "x") and hasattr(value, "y") and hasattr(value, "z")
+
+
+def _is_enum(value: Any) -> bool:
+    # pybind11 enums expose __members__ on the type and .name on the value
+    return hasattr(type(value), "__members__") and hasattr(value, "name")
+
+
+def _encode_str(value: str, out: bytearray) -> None:
+    raw = value.encode("utf-8")
+    out += _U32.pack(len(raw))
+    out += raw
+
+
+def encode_value(value: Any, out: bytearray) -> None:
+    """Append the tagged binary encoding of value to out."""
+    if value is None:
+        out += b"N"
+    elif value is True:
+        out += b"T"
+    elif value is False:
+        out += b"F"
+    elif isinstance(value, int) and not _is_enum(value):
+        out += b"i"
+        out += _I64.pack(value)
+    elif isinstance(value, float):
+        out += b"d"
+        out += _F64.pack(value)
+    elif isinstance(value, str):
+        out += b"s"
+        _encode_str(value, out)
+    elif _is_enum(value):
+        out += b"e"
+        _encode_str(type(value).__name__, out)
+        _encode_str(value.name, out)
+    elif _is_point(value):
+        out += b"p"
+        out += _POINT.pack(float(value.x), float(value.y), float(value.z))
+    elif isinstance(value, Iterable):
+        items = list(value)
+        out += b"l"
+        out += _U32.pack(len(items))
+        for item in items:
+            encode_value(item, out)
+    else:
+        raise TypeError(f"Cannot encode value of type {type(value).__name__!r}")
+
+
+def _decode_str(buf, offset: int) -> tuple[str, int]:
+    (length,) = _U32.unpack_from(buf, offset)
+    offset += _U32.size
+    return bytes(buf[offset:offset + length]).decode("utf-8"), offset + length
+
+
+def decode_value(buf, offset: int, enum_resolver: EnumResolver | None = None) -> tuple[Any, int]:
+    """Decode one tagged value from buf starting at offset; return (value, next offset)."""
+    tag = buf[offset:offset + 1]
+    offset += 1
+    if tag == b"N":
+        return None, offset
+    if tag == b"T":
+        return True, offset
+    if tag == b"F":
+        return False, offset
+    if tag == b"i":
+        return _I64.unpack_from(buf, offset)[0], offset + _I64.size
+    if tag == b"d":
+        return _F64.unpack_from(buf, offset)[0], offset + _F64.size
+    if tag == b"s":
+        return _decode_str(buf, offset)
+    if tag == b"p":
+        return Point3D(*_POINT.unpack_from(buf, offset)), offset + _POINT.size
+    if tag == b"e":
+        type_name, offset = _decode_str(buf, offset)
+        name, offset = _decode_str(buf, offset)
+        resolved = enum_resolver(type_name, name) if enum_resolver else None
+        return (resolved if resolved is not None else CapturedEnum(type_name, name)), offset
+    if tag == b"l":
+        (count,) = _U32.unpack_from(buf, offset)
+        offset += _U32.size
+        items = []
+        for _ in range(count):
+            item, offset = decode_value(buf, offset, enum_resolver)
+            items.append(item)
+        return items, offset
+    raise ValueError(f"Corrupt capture: unknown tag {tag!r} at offset {offset - 1}")
+
+
+def encode_call(controller: str, function: str, args: tuple, kwargs: dict | None = None) -> bytes:
+    """Return the lookup key of a controller call."""
+    out = bytearray()
+    encode_value([controller, function, list(args), sorted((kwargs or {}).items())], out)
+    return bytes(out)
+
+
+class CaptureWriter:
+    """Append-only writer of (call key -> result) records.
+
+    Only the first result per call key is kept, which matches how the allocator
+    reads the model before writing any assignment back.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._seen: set[bytes] = set()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def write(self, key: bytes, value: Any) -> None:
+        if key in self._seen:
+            return
+        payload = bytearray()
+        encode_value(value, payload)
+        self._file.write(_RECORD_HEADER.pack(len(key), len(payload)))
+        self._file.write(key)
+        self._file.write(payload)
+        self._seen.add(key)
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self) -> "CaptureWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class CaptureReader:
+    """Memory-mapped reader; values are decoded lazily on lookup."""
+
+    def __init__(self, path: str, enum_resolver: EnumResolver | None = None):
+        self._path = path
+        self._enum_resolver = enum_resolver
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Not a cadwork capture file: {path!r}")
+        self._index: dict[bytes, tuple[int, int]] = self._build_index()
+
+    def _build_index(self) -> dict[bytes, tuple[int, int]]:
+        index: dict[bytes, tuple[int, int]] = {}
+        mm = self._mm
+        offset, end = len(MAGIC), len(mm)
+        while offset < end:
+            if offset + _RECORD_HEADER.size > end:
+                break
+            key_len, value_len = _RECORD_HEADER.unpack_from(mm, offset)
+            record_end = offset + _RECORD_HEADER.size + key_len + value_len
+            if record_end > end:
+                break
+            offset += _RECORD_HEADER.size
+            key = mm[offset:offset + key_len]
+            offset += key_len
+            index.setdefault(key, (offset, value_len))
+            offset = record_end
+        if offset < end:
+            # A session that crashed mid-write leaves a partial last record
+            logger.warning(f"Ignoring truncated record at offset {offset} of capture {self._path!r}")
+        return index
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def lookup(self, key: bytes) -> Any:
+        offset, _ = self._index[key]
+        value, _ = decode_value(self._mm, offset, self._enum_resolver)
+        return value
+
+    def close(self) -> None:
+        if not self._mm.closed:
+            self._mm.close()
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self) -> "CaptureReader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,199 @@
+import dataclasses
+import json
+import mmap
+import struct
+import uuid
+from typing import Iterable, Sequence
+
+import numpy as np
+
+MAGIC = b"CWSNAP01"
+VERSION = 1
+ALIGNMENT = 64
+
+# magic, version, element count, metadata offset, metadata length
+_HEADER = struct.Struct("<8sIxxxxQQQ")
+
+# Fixed column order and per-element layout; every column starts on an ALIGNMENT boundary.
+COLUMNS: tuple[tuple[str, str, tuple[int, ...]], ...] = (
+    ("element_ids", "<i8", ()),
+    ("guids", "u1", (16,)),
+    ("kinds", "u1", ()),
+    ("group_keys", "<i4", ()),
+    ("names", "<i4", ()),
+    ("p1", "<f8", (3,)),
+    ("axes", "<f8", (3, 3)),
+    ("bbox", "<f8", (8, 3)),
+    ("buildings", "<i4", ()),
+    ("storeys", "<i4", ()),
+)
+
+NO_STRING = -1
+
+
+@dataclasses.dataclass
+class SnapshotRow:
+    """Per-element data the allocator reads from cadwork."""
+    element_id: int
+    guid: str
+    kind: int
+    group_key: str
+    name: str
+    p1: Sequence[float]
+    axes: Sequence[Sequence[float]]  # local x, y, z direction
+    bbox: Sequence[Sequence[float]]  # 8 corner points
+    building: str | None
+    storey: str | None
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _column_layout(count: int) -> tuple[dict[str, tuple[int, np.dtype, tuple[int, ...]]], int]:
+    layout = {}
+    offset = _align(_HEADER.size)
+    for name, dtype, shape in COLUMNS:
+        dt = np.dtype(dtype)
+        layout[name] = (offset, dt, shape)
+        offset = _align(offset + count * dt.itemsize * int(np.prod(shape, dtype=np.int64)))
+    return layout, offset
+
+
+class _StringTable:
+    def __init__(self) -> None:
+        self.strings: list[str] = []
+        self._index: dict[str, int] = {}
+
+    def add(self, value: str | None) -> int:
+        if value is None:
+            return NO_STRING
+        idx = self._index.get(value)
+        if idx is None:
+            idx = len(self.strings)
+            self.strings.append(value)
+            self._index[value] = idx
+        return idx
+
+
+def write_element_snapshot(path: str, rows: Iterable[SnapshotRow],
+                           buildings: dict[str, list[tuple[str, float]]]) -> int:
+    """
+    Write rows to a columnar snapshot file and return the number of elements written.
+
+    buildings maps building name -> [(storey name, elevation), ...].
+    """
+    rows = list(rows)
+    count = len(rows)
+    strings = _StringTable()
+    columns = {name: np.zeros((count, *shape), dtype=dtype) for name, dtype, shape in COLUMNS}
+    for i, row in enumerate(rows):
+        columns["element_ids"][i] = row.element_id
+        columns["guids"][i] = np.frombuffer(uuid.UUID(row.guid.strip("{}")).bytes, dtype="u1")
+        columns["kinds"][i] = row.kind
+        columns["group_keys"][i] = strings.add(row.group_key or "")
+        columns["names"][i] = strings.add(row.name or "")
+        columns["p1"][i] = row.p1
+        columns["axes"][i] = row.axes
+        columns["bbox"][i] = row.bbox
+        columns["buildings"][i] = strings.add(row.building)
+        columns["storeys"][i] = strings.add(row.storey)
+
+    layout, meta_offset = _column_layout(count)
+    meta = json.dumps({"strings": strings.strings, "buildings": buildings}).encode("utf-8")
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, count, meta_offset, len(meta)))
+        for name, (offset, _, _) in layout.items():
+            f.seek(offset)
+            f.write(columns[name].tobytes())
+        f.seek(meta_offset)
+        f.write(meta)
+    return count
+
+
+class ElementSnapshot:
+    """
+    Memory-mapped element snapshot. Column arrays are read-only views onto the file.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, meta_offset, meta_length = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not an element snapshot: {path!r}")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"Unsupported snapshot version {version} in {path!r}")
+
+        self.count: int = count
+        layout, _ = _column_layout(count)
+        for name, (offset, dtype, shape) in layout.items():
+            items = count * int(np.prod(shape, dtype=np.int64))
+            array = np.frombuffer(self._mm, dtype=dtype, count=items, offset=offset).reshape((count, *shape))
+            setattr(self, name, array)
+
+        meta = json.loads(bytes(self._mm[meta_offset:meta_offset + meta_length]).decode("utf-8"))
+        self.strings: list[str] = meta["strings"]
+        self.building_storeys: dict[str, list[tuple[str, float]]] = {
+            name: [(storey, float(elevation)) for storey, elevation in storeys]
+            for name, storeys in meta["buildings"].items()
+        }
+        self._rows: dict[int, int] | None = None
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _row_index(self) -> dict[int, int]:
+        if self._rows is None:
+            self._rows = {eid: i for i, eid in enumerate(self.element_ids.tolist())}
+        return self._rows
+
+    def row(self, element_id: int) -> int:
+        """Row index of element_id."""
+        return self._row_index()[element_id]
+
+    def rows(self, element_ids: Iterable[int]) -> np.ndarray:
+        """Row index per element id; -1 for ids not in the snapshot."""
+        index = self._row_index()
+        return np.fromiter((index.get(eid, -1) for eid in element_ids), dtype=np.int64)
+
+    def string(self, idx: int) -> str | None:
+        return None if idx == NO_STRING else self.strings[idx]
+
+    def guid(self, row: int) -> str:
+        return str(uuid.UUID(bytes=self.guids[row].tobytes()))
+
+    def z_extents(self) -> tuple[np.ndarray, np.ndarray]:
+        """Per-element (z_min, z_max) of the bbox corners."""
+        zs = self.bbox[:, :, 2]
+        return zs.min(axis=1), zs.max(axis=1)
+
+    def close(self) -> None:
+        # Views must be dropped before the map can be closed
+        for name, _, _ in COLUMNS:
+            self.__dict__.pop(name, None)
+        if not self._mm.closed:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass  # views are still referenced elsewhere; the map closes once they are released
+        if not self._file.closed:
+            self._file.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self) -> "ElementSnapshot":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def load_element_snapshot(path: str) -> ElementSnapshot:
+    return ElementSnapshot(path)
@@ -0,0 +1,91 @@
+import importlib
+import logging
+import sys
+from types import ModuleType
+from typing import Any, Callable
+
+from capture.capture_file import CaptureWriter, encode_call
+
+logger = logging.getLogger(__name__)
+
+CONTROLLER_MODULES = ("element_controller", "geometry_controller", "attribute_controller", "bim_controller")
+
+
+class RecordingController:
+    """Proxy around a cadwork controller module that records every call result."""
+
+    def __init__(self, name: str, module: ModuleType, writer: CaptureWriter):
+        self._name = name
+        self._module = module
+        self._writer = writer
+        self._wrapped: dict[str, Callable] = {}
+
+    def __getattr__(self, function: str) -> Any:
+        attr = getattr(self._module, function)
+        if not callable(attr):
+            return attr
+        wrapped = self._wrapped.get(function)
+        if wrapped is None:
+            wrapped = self._wrap(function, attr)
+            self._wrapped[function] = wrapped
+        return wrapped
+
+    def _wrap(self, function: str, call: Callable) -> Callable:
+        def recorded(*args, **kwargs):
+            result = call(*args, **kwargs)
+            try:
+                self._writer.write(encode_call(self._name, function, args, kwargs), result)
+            except TypeError as e:
+                logger.warning(f"Not recording {self._name}.{function}: {e}")
+            return result
+
+        recorded.__name__ = function
+        return recorded
+
+
+class SessionRecorder:
+    """
+    Records the cadwork controller calls made by the allocator into a capture file.
+
+    Must be installed before ``allocation`` is imported, since the allocation
+    modules bind the controller modules at import time.
+    """
+
+    def __init__(self, path: str, controllers: tuple[str, ...] = CONTROLLER_MODULES):
+        self._writer = CaptureWriter(path)
+        self._controllers = controllers
+        self._originals: dict[str, ModuleType] = {}
+
+    def wrap(self, name: str, module: ModuleType) -> RecordingController:
+        return RecordingController(name, module, self._writer)
+
+    def install(self) -> None:
+        for name in self._controllers:
+            module = sys.modules.get(name) or importlib.import_module(name)
+            if isinstance(module, RecordingController):
+                continue
+            self._originals[name] = module
+            sys.modules[name] = self.wrap(name, module)
+
+    def uninstall(self) -> None:
+        for name, module in self._originals.items():
+            sys.modules[name] = module
+        self._originals.clear()
+
+    def close(self) -> None:
+        self.uninstall()
+        self._writer.close()
+        logger.info(f"Recorded {len(self._writer)} distinct calls to {self._writer.path}")
+
+    def __enter__(self) -> "SessionRecorder":
+        self.install()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def install_recorder(path: str) -> SessionRecorder:
+    recorder = SessionRecorder(path)
+    recorder.install()
+    return recorder
@@ -0,0 +1,132 @@
+import enum
+import logging
+import sys
+from types import ModuleType
+from typing import Any, Callable
+
+from capture.capture_file import CaptureReader, Point3D, encode_call
+from capture.recorder import CONTROLLER_MODULES
+
+logger = logging.getLogger(__name__)
+
+
+class element_grouping_type(enum.Enum):
+    group = 0
+    subgroup = 1
+
+
+_KNOWN_ENUMS: dict[str, type[enum.Enum]] = {
+    "element_grouping_type": element_grouping_type,
+}
+
+
+def _resolve_enum(type_name: str, name: str) -> Any:
+    enum_type = _KNOWN_ENUMS.get(type_name)
+    if enum_type is None:
+        return None
+    return enum_type.__members__.get(name)
+
+
+def create_cadwork_module() -> ModuleType:
+    """Create a minimal ``cadwork`` module providing the types the allocator references."""
+    module = ModuleType("cadwork")
+    module.point_3d = Point3D
+    for type_name, enum_type in _KNOWN_ENUMS.items():
+        setattr(module, type_name, enum_type)
+    return module
+
+
+class ReplayController:
+    """Serves controller calls from a capture; ``set_*`` calls are collected instead of executed."""
+
+    def __init__(self, name: str, backend: "ReplayBackend"):
+        self._name = name
+        self._backend = backend
+        self._functions: dict[str, Callable] = {}
+
+    def __getattr__(self, function: str) -> Callable:
+        if function.startswith("__"):
+            raise AttributeError(function)
+        served = self._functions.get(function)
+        if served is None:
+            served = self._serve(function)
+            self._functions[function] = served
+        return served
+
+    def _serve(self, function: str) -> Callable:
+        name, backend = self._name, self._backend
+        is_write = function.startswith("set_")
+
+        def replayed(*args, **kwargs):
+            key = encode_call(name, function, args, kwargs)
+            if is_write:
+                backend.writes.append((name, function, args))
+                return backend.reader.lookup(key) if key in backend.reader else None
+            try:
+                return backend.reader.lookup(key)
+            except KeyError:
+                raise LookupError(f"Call not in capture: {name}.{function}{args}") from None
+
+        replayed.__name__ = function
+        return replayed
+
+
+class ReplayBackend:
+    """
+    Replays a capture written by SessionRecorder without cadwork running.
+
+    Install it before ``allocation`` is imported; it registers stand-ins for
+    ``cadwork`` and the controller modules in ``sys.modules``.
+    """
+
+    def __init__(self, path: str):
+        self.reader = CaptureReader(path, enum_resolver=_resolve_enum)
+        self.writes: list[tuple[str, str, tuple]] = []
+
+    def controller(self, name: str) -> ReplayController:
+        return ReplayController(name, self)
+
+    def install(self) -> None:
+        sys.modules["cadwork"] = create_cadwork_module()
+        for name in CONTROLLER_MODULES:
+            sys.modules[name] = self.controller(name)
+        logger.info(f"Replaying {len(self.reader)} recorded calls from {self.reader.path}")
+
+    def close(self) -> None:
+        self.reader.close()
+
+    def __enter__(self) -> "ReplayBackend":
+        self.install()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class OfflineController:
+    """Controller stand-in for sources that never call cadwork, e.g. element snapshots."""
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, function: str) -> Callable:
+        if function.startswith("__"):
+            raise AttributeError(function)
+
+        def unavailable(*args, **kwargs):
+            raise RuntimeError(f"cadwork API is not available offline: {self._name}.{function}")
+
+        return unavailable
+
+
+def install_offline_stubs() -> None:
+    """Register cadwork stand-ins so ``allocation`` can be imported without cadwork."""
+    sys.modules.setdefault("cadwork", create_cadwork_module())
+    for name in CONTROLLER_MODULES:
+        sys.modules.setdefault(name, OfflineController(name))
+
+
+def install_replay(path: str) -> ReplayBackend:
+    backend = ReplayBackend(path)
+    backend.install()
+    return backend
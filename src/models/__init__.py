@@ -1,12 +1,15 @@
-from .guid import Guid, create_guid
+from .guid import Guid, create_guid, derive_guid
 from .model_element import IModelElement, ModelLeafElement, ModelNodeElement, Roof, Wall, Slab, Container
 from .model_element_geometry import IModelElementGeometry, ModelElementGeometry
-from .aabb import BoundingBox
+from .aabb import BoundingBox, BoundingBoxArray
 from .colored_logging_setup import setup_colored_logging
+from .building_storey_boundary import BuildingStoreyBoundary
+from .coverage import StoreyIntervalIndex, top_k_coverage, vertical_coverage_matrix
 
 __all__ = [
     "Guid",
     "create_guid",
+    "derive_guid",
     "IModelElement",
     "ModelLeafElement",
     "ModelNodeElement",
@@ -17,4 +20,9 @@ __all__ = [
     "IModelElementGeometry",
     "ModelElementGeometry",
     "BoundingBox",
+    "BoundingBoxArray",
+    "BuildingStoreyBoundary",
+    "StoreyIntervalIndex",
+    "top_k_coverage",
+    "vertical_coverage_matrix",
 ]
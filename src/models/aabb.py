@@ -1,5 +1,12 @@
+import numpy as np
 from compas.geometry import bounding_box
 
+# Corner order of compas.geometry.bounding_box as (x, y, z) picks from (min, max)
+_CORNER_PICKS = np.array([
+    [0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],
+    [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1],
+])
+
 
 class BoundingBox:
     """Bounding box defined by 8 corner points.
@@ -8,11 +15,14 @@ class BoundingBox:
     ----------
     corner_points : list[[float, float, float]]
         XYZ coordinates of 8 points defining a box.
+    boxed : bool, optional
+        True if corner_points already are the 8 corners of an axis-aligned box,
+        in compas order; they are then used as given.
 
     """
 
-    def __init__(self, corner_points: list):
-        self._corner_points = bounding_box(corner_points)
+    def __init__(self, corner_points: list, *, boxed: bool = False):
+        self._corner_points = list(corner_points) if boxed else bounding_box(corner_points)
 
     @classmethod
     def from_points(cls, points: list) -> "BoundingBox":
@@ -29,8 +39,7 @@ class BoundingBox:
             The bounding box.
 
         """
-        bbox = bounding_box(points)
-        return cls(bbox)
+        return cls(bounding_box(points), boxed=True)
 
     def to_list(self) -> list:
         """Returns the corner points of the bounding box as a list.
@@ -42,3 +51,52 @@ class BoundingBox:
 
         """
         return self._corner_points
+
+
+class BoundingBoxArray:
+    """Axis-aligned bounding boxes of N elements backed by an (N, 8, 3) array.
+
+    Parameters
+    ----------
+    corner_points : array-like of shape (N, 8, 3)
+        XYZ coordinates of 8 points per element, e.g. local bbox vertices.
+
+    """
+
+    def __init__(self, corner_points):
+        corners = _as_corner_array(corner_points)
+        lower = corners.min(axis=1)
+        upper = corners.max(axis=1)
+        extremes = np.stack([lower, upper], axis=1)  # (N, 2, 3)
+        self._corners = extremes[:, _CORNER_PICKS, np.arange(3)]
+        self._lower = lower
+        self._upper = upper
+
+    def __len__(self) -> int:
+        return len(self._corners)
+
+    def __getitem__(self, i: int) -> BoundingBox:
+        return BoundingBox(self._corners[i].tolist(), boxed=True)
+
+    def z_min(self) -> np.ndarray:
+        return self._lower[:, 2]
+
+    def z_max(self) -> np.ndarray:
+        return self._upper[:, 2]
+
+    def to_array(self) -> np.ndarray:
+        """Returns the (N, 8, 3) corner points in compas bounding_box order."""
+        return self._corners
+
+
+def _as_corner_array(corner_points) -> np.ndarray:
+    corners = np.asarray(corner_points, dtype=float)
+    if corners.ndim != 3 or corners.shape[1:] != (8, 3):
+        raise ValueError(f"Expected corner points of shape (N, 8, 3), got {corners.shape}")
+    return corners
+
+
+def corner_z_extents(corner_points) -> tuple[np.ndarray, np.ndarray]:
+    """Per-element (z_min, z_max) of an (N, 8, 3) corner array."""
+    zs = _as_corner_array(corner_points)[:, :, 2]
+    return zs.min(axis=1), zs.max(axis=1)
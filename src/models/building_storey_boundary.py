@@ -1,16 +1,37 @@
 from typing import Iterable, Tuple
 
 import compas
+import numpy as np
 from compas.geometry import Frame
 
+from models.aabb import corner_z_extents
+
+
+# Z values closer than this to a storey elevation are treated as lying on it
+DEFAULT_Z_TOLERANCE = 1e-5
+
 
 class BuildingStoreyBoundary:
-    """Building storey boundary is defined by a bottom and top frame."""
+    """
+    Building storey boundary is defined by a bottom and top frame.
+
+    The top frame may sit at +inf for the storey above the highest elevation.
+    """
 
-    def __init__(self, identifier: str, bottom_frame: Frame, top_frame: Frame):
+    def __init__(self, identifier: str, bottom_frame: Frame, top_frame: Frame, storey_name: str | None = None,
+                 tolerance: float = DEFAULT_Z_TOLERANCE):
+        if tolerance < 0.0:
+            raise ValueError("tolerance must be >= 0")
         self.identifier = identifier
         self.bottom_frame = bottom_frame
         self.top_frame = top_frame
+        self.storey_name = storey_name
+        self.tolerance = tolerance
+        b_min, b_max = self.z_range()
+        # (bottom - tol, bottom + tol, top - tol, top + tol), precomputed for snapping
+        self._band: Tuple[float, float, float, float] = (
+            b_min - tolerance, b_min + tolerance, b_max - tolerance, b_max + tolerance
+        )
 
     def height(self) -> float:
         """Height of the storey boundary."""
@@ -20,12 +41,48 @@ class BuildingStoreyBoundary:
         """Return (z_min, z_max) of the boundary in world Z."""
         return self.bottom_frame.point.z, self.top_frame.point.z
 
+    def band(self) -> Tuple[float, float, float, float]:
+        """Return the tolerance band (bottom - tol, bottom + tol, top - tol, top + tol)."""
+        return self._band
+
+    def snap(self, z: float) -> float:
+        """Snap z onto the bottom or top elevation if it lies within the tolerance band."""
+        bottom_low, bottom_high, top_low, top_high = self._band
+        if bottom_low <= z <= bottom_high:
+            return self.bottom_frame.point.z
+        if top_low <= z <= top_high:
+            return self.top_frame.point.z
+        return z
+
+    def contains_z(self, z: float) -> bool:
+        """Point-in-interval test on [bottom, top) after snapping."""
+        z = self.snap(z)
+        b_min, b_max = self.z_range()
+        return b_min <= z < b_max
+
+    def coverage(self, z_min: float, z_max: float) -> float:
+        """
+        Return the fraction of [z_min, z_max] inside the boundary along Z.
+
+        Ends within the tolerance band are snapped onto the elevation first. Flat
+        extents (height within tolerance) are covered fully by the storey their
+        elevation falls into and not at all by the others.
+        """
+        z_min, z_max = self.snap(z_min), self.snap(z_max)
+        if z_max - z_min <= self.tolerance:
+            return 1.0 if self.contains_z(0.5 * (z_min + z_max)) else 0.0
+
+        b_min, b_max = self.z_range()
+        overlap = max(0.0, min(z_max, b_max) - max(z_min, b_min))
+        return overlap / (z_max - z_min)
+
     def contains_bbox_fully(self, bbox_points: Iterable[compas.geometry.Point]) -> bool:  # Iterable[Iterable[float]]
         """
         Check if the entire axis-aligned bounding box (given as its 8 corner points)
         is inside the vertical extent of this storey boundary.
         """
         z_min, z_max = self._bbox_z_minmax(bbox_points)
+        z_min, z_max = self.snap(z_min), self.snap(z_max)
         b_min, b_max = self.z_range()
         return z_min >= b_min and z_max <= b_max
 
@@ -39,24 +96,58 @@ class BuildingStoreyBoundary:
             raise ValueError("fraction must be between 0 and 1")
 
         z_min, z_max = self._bbox_z_minmax(bbox_points)
-        if z_max <= z_min:
-            return False
+        return self.coverage(z_min, z_max) >= fraction
+
+    def snap_array(self, z: np.ndarray) -> np.ndarray:
+        """Vectorized snap()."""
+        z = np.asarray(z, dtype=float)
+        bottom_low, bottom_high, top_low, top_high = self._band
+        b_min, b_max = self.z_range()
+        z = np.where((z >= bottom_low) & (z <= bottom_high), b_min, z)
+        return np.where((z >= top_low) & (z <= top_high), b_max, z)
+
+    def coverage_array(self, z_min: np.ndarray, z_max: np.ndarray) -> np.ndarray:
+        """Vectorized coverage() for N extents, via a single-boundary StoreyIntervalIndex."""
+        from models.coverage import StoreyIntervalIndex  # coverage imports this module
+
+        return StoreyIntervalIndex([self]).coverage(z_min, z_max)[:, 0]
 
+    def contains_bbox_fully_array(self, corner_points) -> np.ndarray:
+        """
+        contains_bbox_fully() for N elements given as an (N, 8, 3) corner array;
+        returns a boolean array.
+        """
+        z_min, z_max = corner_z_extents(corner_points)
+        z_min, z_max = self.snap_array(z_min), self.snap_array(z_max)
         b_min, b_max = self.z_range()
+        return (z_min >= b_min) & (z_max <= b_max)
 
-        # Overlap of [z_min, z_max] with [b_min, b_max]
-        overlap_low = max(z_min, b_min)
-        overlap_high = min(z_max, b_max)
-        overlap = max(0.0, overlap_high - overlap_low)
+    def contains_bbox_fraction_array(self, corner_points, fraction: float) -> np.ndarray:
+        """
+        contains_bbox_fraction() for N elements given as an (N, 8, 3) corner array;
+        returns a boolean array.
+        """
+        if not (0.0 <= fraction <= 1.0):
+            raise ValueError("fraction must be between 0 and 1")
 
-        bbox_height = z_max - z_min
-        covered = overlap / bbox_height
-        return covered >= fraction
+        z_min, z_max = corner_z_extents(corner_points)
+        return self.coverage_array(z_min, z_max) >= fraction
 
     @staticmethod
     def _bbox_z_minmax(points: Iterable[compas.geometry.Point]) -> Tuple[float, float]:
-        zs = [p.z for p in points]
-        return min(zs), max(zs)
+        # Single pass, without collecting the z values
+        it = iter(points)
+        try:
+            z_min = z_max = next(it).z
+        except StopIteration:
+            raise ValueError("bbox_points must not be empty") from None
+        for p in it:
+            z = p.z
+            if z < z_min:
+                z_min = z
+            elif z > z_max:
+                z_max = z
+        return z_min, z_max
 
     def __repr__(self) -> str:
         return (f"BuildingStoreyBoundary(identifier={self.identifier},"
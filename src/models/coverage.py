@@ -0,0 +1,124 @@
+from typing import Iterable
+
+import numpy as np
+
+from models.building_storey_boundary import BuildingStoreyBoundary
+
+
+def vertical_coverage_matrix(z_min: np.ndarray, z_max: np.ndarray,
+                             b_min: np.ndarray, b_max: np.ndarray) -> np.ndarray:
+    """
+    Return the (N, S) matrix of the fraction of each element's z-extent
+    [z_min, z_max] overlapped by each boundary [b_min, b_max].
+
+    Elements with zero or negative height get coverage 0, like
+    StoreyAssignmentService._vertical_coverage.
+    """
+    z_min = np.asarray(z_min, dtype=float)[:, None]
+    z_max = np.asarray(z_max, dtype=float)[:, None]
+    b_min = np.asarray(b_min, dtype=float)[None, :]
+    b_max = np.asarray(b_max, dtype=float)[None, :]
+
+    overlap = np.clip(np.minimum(z_max, b_max) - np.maximum(z_min, b_min), 0.0, None)
+    height = z_max - z_min
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coverage = np.where(height > 0.0, overlap / height, 0.0)
+    return coverage
+
+
+class StoreyIntervalIndex:
+    """
+    Sorted arrays of storey boundaries for vectorized snapping, point-in-interval
+    lookup and coverage. Boundaries are expected not to overlap.
+    """
+
+    def __init__(self, boundaries: Iterable[BuildingStoreyBoundary]):
+        self.boundaries: list[BuildingStoreyBoundary] = sorted(boundaries, key=lambda b: b.z_range()[0])
+        ranges = np.array([b.z_range() for b in self.boundaries], dtype=float).reshape(-1, 2)
+        self.b_min: np.ndarray = ranges[:, 0]
+        self.b_max: np.ndarray = ranges[:, 1]
+        tolerances = np.array([b.tolerance for b in self.boundaries], dtype=float)
+        self.tolerance: float = float(tolerances.max()) if len(tolerances) else 0.0
+
+        # Distinct finite elevations with the widest tolerance of the boundaries sharing them
+        bands: dict[float, float] = {}
+        for z, tol in zip(np.concatenate([self.b_min, self.b_max]).tolist(), np.tile(tolerances, 2).tolist()):
+            if np.isfinite(z):
+                bands[z] = max(tol, bands.get(z, 0.0))
+        self.levels: np.ndarray = np.array(sorted(bands), dtype=float)
+        self.level_tolerances: np.ndarray = np.array([bands[z] for z in self.levels.tolist()], dtype=float)
+
+    def __len__(self) -> int:
+        return len(self.boundaries)
+
+    def snap(self, z: np.ndarray) -> np.ndarray:
+        """Snap values lying within a level's tolerance band onto that level."""
+        z = np.asarray(z, dtype=float)
+        if not len(self.levels):
+            return z.copy()
+        right = np.clip(np.searchsorted(self.levels, z), 0, len(self.levels) - 1)
+        left = np.clip(right - 1, 0, None)
+        nearest = np.where(np.abs(z - self.levels[left]) <= np.abs(z - self.levels[right]), left, right)
+        within = np.abs(z - self.levels[nearest]) <= self.level_tolerances[nearest]
+        return np.where(within, self.levels[nearest], z)
+
+    def locate(self, z: np.ndarray) -> np.ndarray:
+        """Index of the boundary whose [bottom, top) contains each (already snapped) z, or -1."""
+        z = np.asarray(z, dtype=float)
+        idx = np.searchsorted(self.b_min, z, side="right") - 1
+        safe = np.clip(idx, 0, None)
+        inside = (idx >= 0) & (z < self.b_max[safe]) if len(self.boundaries) else np.zeros(z.shape, dtype=bool)
+        return np.where(inside, idx, -1)
+
+    def is_flat(self, z_min: np.ndarray, z_max: np.ndarray) -> np.ndarray:
+        """Extents whose (snapped) height is within tolerance."""
+        return (np.asarray(z_max, dtype=float) - np.asarray(z_min, dtype=float)) <= self.tolerance
+
+    def coverage(self, z_min: np.ndarray, z_max: np.ndarray) -> np.ndarray:
+        """
+        (N, S) coverage matrix over self.boundaries after snapping. Flat extents
+        take the point-in-interval fast path and get 1.0 for the containing storey.
+        """
+        z_min, z_max = self.snap(z_min), self.snap(z_max)
+        flat = self.is_flat(z_min, z_max)
+        coverage = vertical_coverage_matrix(z_min, z_max, self.b_min, self.b_max)
+        if flat.any():
+            rows = np.flatnonzero(flat)
+            located = self.locate(0.5 * (z_min[rows] + z_max[rows]))
+            coverage[rows] = 0.0
+            hit = located >= 0
+            coverage[rows[hit], located[hit]] = 1.0
+        return coverage
+
+
+def top_k_coverage(coverage: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return (indices, values) of the k largest coverages per row, best first.
+
+    Uses a partial sort per row; ties are ordered by lower boundary index, the
+    order StoreyAssignmentService prefers. Rows with fewer than k boundaries
+    are padded with index -1 and value 0.
+    """
+    if k < 1:
+        raise ValueError("k must be >= 1")
+    n, s = coverage.shape
+    kk = min(k, s)
+    if kk < s:
+        # k-th largest value per row by partial sort; on ties at the cut keep the lowest indices
+        kth = -np.partition(-coverage, kk - 1, axis=1)[:, kk - 1:kk]
+        above = coverage > kth
+        tied = coverage == kth
+        needed = kk - above.sum(axis=1, keepdims=True)
+        selected = above | (tied & (np.cumsum(tied, axis=1) <= needed))
+        candidates = np.nonzero(selected)[1].reshape(n, kk)
+    else:
+        candidates = np.broadcast_to(np.arange(s), (n, s))
+    values = np.take_along_axis(coverage, candidates, axis=1)
+    # Sort the k candidates: coverage descending, then boundary index ascending
+    order = np.lexsort((candidates, -values), axis=1) if n else np.zeros((0, kk), dtype=np.intp)
+    indices = np.take_along_axis(candidates, order, axis=1)
+    values = np.take_along_axis(values, order, axis=1)
+    if kk < k:
+        indices = np.pad(indices, ((0, 0), (0, k - kk)), constant_values=-1)
+        values = np.pad(values, ((0, 0), (0, k - kk)), constant_values=0.0)
+    return indices, values
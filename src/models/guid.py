@@ -1,5 +1,8 @@
 import uuid
 
+# Namespace for guids of synthetic nodes that have no cadwork element
+SYNTHETIC_NAMESPACE = uuid.UUID("8d010446-0aea-5d37-af50-4e0faf8c3147")
+
 
 class Guid:
     def __init__(self, guid: uuid.UUID | str):
@@ -18,3 +21,8 @@ class Guid:
 
 def create_guid() -> Guid:
     return Guid(uuid.uuid4())
+
+
+def derive_guid(*parts: str) -> Guid:
+    """Stable guid derived from parts, identical across runs and sessions."""
+    return Guid(uuid.uuid5(SYNTHETIC_NAMESPACE, "/".join(parts)))
@@ -3,8 +3,6 @@ import os
 import sys
 from pathlib import Path
 
-import element_controller
-
 base_dir = Path(__file__).absolute().parent
 src_dir = base_dir / "src"
 dep_dir = base_dir / ".venv" / "Lib" / "site-packages"
@@ -15,6 +13,16 @@ for p in {str(src_dir), str(base_dir), str(dep_dir)}:
 
 [print(path) for path in sys.path]  # if os.path.isdir(path)
 
+# Set STOREY_ALLOCATOR_CAPTURE=<file> to record the cadwork API session for offline replay.
+# The recorder has to be installed before allocation binds the controller modules.
+capture_path = os.environ.get("STOREY_ALLOCATOR_CAPTURE")
+recorder = None
+if capture_path:
+    import capture
+
+    recorder = capture.install_recorder(capture_path)
+
+import element_controller
 import allocation
 import models
 
@@ -55,9 +63,20 @@ def main():
     [logger.info(f"Registered {key}") for key in registry.names()]
 
     element_ids = element_controller.get_all_identifiable_element_ids()
+    if os.environ.get("STOREY_ALLOCATOR_PROFILE_MEMORY"):
+        # Opt-in: run the stages separately under tracemalloc and log the memory report
+        report = allocation.profile_allocation(registry, element_ids, coverage_threshold=0.6)
+        for violation in report.budget_violations():
+            logger.warning(f"Memory budget exceeded: {violation}")
+        return
+
     storey_assigner = allocation.StoreyAssignmentService(registry, coverage_threshold=0.6)
     storey_assigner.assign_elements(element_ids)
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        if recorder is not None:
+            recorder.close()
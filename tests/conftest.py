@@ -0,0 +1,86 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+src_dir = Path(__file__).absolute().parent.parent / "src"
+
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+import capture
+
+# allocation binds the cadwork modules at import time; tests run on snapshots only
+capture.install_offline_stubs()
+
+import allocation
+from models.model_element import ElementKind
+
+STOREYS = {"B1": [("EG", 0.0), ("OG1", 3000.0), ("OG2", 6000.0)], "B2": [("EG", 0.0), ("OG1", 2800.0)]}
+
+
+def snapshot_row(element_id: int, z0: float, height: float, kind: ElementKind = ElementKind.LEAF,
+                 group_key: str = "G1", building: str | None = "B1", storey: str | None = None,
+                 ) -> capture.SnapshotRow:
+    x0 = 100.0 * element_id
+    corners = [[x, y, z] for z in (z0, z0 + height) for x, y in ((x0, 0.0), (x0 + 100.0, 0.0),
+                                                                  (x0 + 100.0, 50.0), (x0, 50.0))]
+    return capture.SnapshotRow(
+        element_id=element_id,
+        guid=f"00000000-0000-0000-0000-{element_id:012d}",
+        kind=kind.value,
+        group_key=group_key,
+        name=f"E{element_id}",
+        p1=[x0, 0.0, z0],
+        axes=[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]],
+        bbox=corners,
+        building=building,
+        storey=storey,
+    )
+
+
+def random_rows(count: int, seed: int = 1) -> list[capture.SnapshotRow]:
+    rnd = random.Random(seed)
+    rows = []
+    for eid in range(1, count + 1):
+        kind = ElementKind.WALL if eid % 50 == 0 else (ElementKind.SLAB if eid % 97 == 0 else ElementKind.LEAF)
+        rows.append(snapshot_row(
+            eid,
+            z0=rnd.choice([0.0, 3000.0, 6000.0, rnd.uniform(-500.0, 8000.0)]),
+            height=rnd.choice([0.0, 200.0, 2800.0, 3000.0, rnd.uniform(1.0, 4000.0)]),
+            kind=kind,
+            group_key=f"G{eid % 60 if eid % 7 else 999}",
+            building=rnd.choice(["B1", "B2", None]),
+        ))
+    return rows
+
+
+@pytest.fixture
+def make_snapshot_source(tmp_path):
+    """Factory writing rows to a snapshot file and returning a SnapshotElementSource over it."""
+    snapshots = []
+
+    def make(rows: list[capture.SnapshotRow], buildings: dict | None = None) -> allocation.SnapshotElementSource:
+        path = str(tmp_path / f"snapshot{len(snapshots)}.bin")
+        capture.write_element_snapshot(path, rows, STOREYS if buildings is None else buildings)
+        snapshot = capture.load_element_snapshot(path)
+        snapshots.append(snapshot)
+        return allocation.SnapshotElementSource(snapshot)
+
+    yield make
+    for snapshot in snapshots:
+        snapshot.close()
+
+
+@pytest.fixture
+def registry_for():
+    """Builds a BuildingRegistry from the buildings of a source."""
+
+    def make(source) -> allocation.BuildingRegistry:
+        registry = allocation.BuildingRegistry()
+        for building in source.buildings().values():
+            registry.upsert(building)
+        return registry
+
+    return make
@@ -0,0 +1,32 @@
+import random
+
+from compas.geometry import bounding_box
+
+from models.aabb import BoundingBox, BoundingBoxArray, corner_z_extents
+
+
+def random_boxes(count: int, seed: int = 3) -> list[list[list[float]]]:
+    rnd = random.Random(seed)
+    return [[[rnd.uniform(-10, 10), rnd.uniform(-10, 10), rnd.uniform(-10, 10)] for _ in range(8)]
+            for _ in range(count)]
+
+
+def test_from_points_matches_constructor():
+    for points in random_boxes(20):
+        assert BoundingBox.from_points(points).to_list() == BoundingBox(points).to_list()
+
+
+def test_boxed_corners_are_kept():
+    corners = bounding_box(random_boxes(1)[0])
+    assert BoundingBox(corners, boxed=True).to_list() == corners
+
+
+def test_array_matches_scalar_boxes():
+    boxes = random_boxes(50)
+    array = BoundingBoxArray(boxes)
+    assert len(array) == 50
+    for i, points in enumerate(boxes):
+        assert array[i].to_list() == BoundingBox(points).to_list()
+    z_min, z_max = corner_z_extents(boxes)
+    assert z_min.tolist() == array.z_min().tolist() == [min(p[2] for p in b) for b in boxes]
+    assert z_max.tolist() == array.z_max().tolist() == [max(p[2] for p in b) for b in boxes]
@@ -0,0 +1,59 @@
+import logging
+
+import pytest
+
+import allocation
+from tests.conftest import random_rows
+
+
+def test_second_run_is_served_from_cache(make_snapshot_source, registry_for, tmp_path, caplog, monkeypatch):
+    rows = random_rows(300)
+    cache = allocation.AllocationCache(path=str(tmp_path / "cache.json"))
+
+    first = make_snapshot_source(rows)
+    allocation.StoreyAssignmentService(registry_for(first), 0.6, first, cache).assign_elements(first.element_ids())
+
+    # A cache hit must not touch model elements
+    def no_create(*args, **kwargs):
+        raise AssertionError("model element created for a cached decision")
+
+    monkeypatch.setattr(allocation.storey_assignment_service.ModelElementFactory, "create", no_create)
+    second = make_snapshot_source(rows)
+    with caplog.at_level(logging.INFO, logger="allocation.storey_assignment_service"):
+        allocation.StoreyAssignmentService(registry_for(second), 0.6, second, cache).assign_elements(
+            second.element_ids())
+
+    assert second.assignments == first.assignments
+    assert "Allocation cache: 600 hits, 0 misses (hit rate 100.0%)" in caplog.text
+
+
+def test_cache_persists_and_evicts(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = allocation.AllocationCache(max_entries=2, path=path)
+    keys = [allocation.AllocationCache.make_key(0.0, float(h), "fp", 0.6) for h in (1, 2, 3)]
+    for i, key in enumerate(keys):
+        cache.put(key, (f"S{i}", 1.0))
+    cache.save()
+
+    loaded = allocation.AllocationCache(path=path)
+    assert len(loaded) == 2
+    assert keys[0] not in loaded
+    assert loaded.get(keys[2]) == ("S2", 1.0)
+
+
+@pytest.mark.parametrize("content", [
+    '{"version": 1}',
+    '[1, 2, 3]',
+    '{"version": 1, "entries": [["key", "EG"]]}',
+    '{"version": 1, "entries": [["key", 3, 1.0]]}',
+    '{"version": 1, "entries": {"key": ["EG", 1.0]}}',
+    '{"version": 2, "entries": []}',
+    'not json',
+])
+def test_malformed_cache_is_ignored(tmp_path, caplog, content):
+    path = tmp_path / "cache.json"
+    path.write_text(content)
+    with caplog.at_level(logging.WARNING, logger="allocation.allocation_cache"):
+        cache = allocation.AllocationCache(path=str(path))
+    assert len(cache) == 0
+    assert "Ignoring" in caplog.text
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import allocation
+import models
+from tests.conftest import STOREYS, snapshot_row
+
+
+def test_top_k_ties_keep_the_lower_storey():
+    coverage = np.array([[0.25, 0.5, 0.5, 0.25], [0.0, 0.0, 0.0, 0.0]])
+    indices, values = models.top_k_coverage(coverage, 3)
+    assert indices.tolist() == [[1, 2, 0], [0, 1, 2]]
+    assert values.tolist() == [[0.5, 0.5, 0.25], [0.0, 0.0, 0.0]]
+
+
+def test_top_k_pads_when_k_exceeds_storeys():
+    indices, values = models.top_k_coverage(np.array([[0.2, 0.8]]), 4)
+    assert indices.tolist() == [[1, 0, -1, -1]]
+    assert values.tolist() == [[0.8, 0.2, 0.0, 0.0]]
+
+
+def test_top_k_empty_input():
+    indices, values = models.top_k_coverage(np.empty((0, 3)), 2)
+    assert indices.shape == values.shape == (0, 2)
+    with pytest.raises(ValueError):
+        models.top_k_coverage(np.empty((0, 3)), 0)
+
+
+def test_detect_flags_ambiguous_and_straddling(make_snapshot_source, registry_for):
+    rows = [snapshot_row(1, 0.0, 3000.0),  # EG only
+            snapshot_row(2, 1500.0, 3000.0),  # half EG, half OG1
+            snapshot_row(3, 2000.0, 5000.0)]  # EG, OG1 and OG2
+    source = make_snapshot_source(rows, {"B1": STOREYS["B1"]})
+    report = allocation.AmbiguityDetector(registry_for(source), source=source).detect(source.element_ids())
+
+    assert report.element_count == 3
+    assert [(r.element_id, r.ambiguous, r.straddling) for r in report.flagged] == [(2, True, False), (3, False, True)]
+    ambiguous, straddling = report.flagged
+    assert [(c.storey_name, c.coverage) for c in ambiguous.candidates] == [("EG", 0.5), ("OG1", 0.5)]
+    assert straddling.storeys_touched == 3
+    assert [c.storey_name for c in straddling.candidates] == ["OG1", "EG", "OG2"]  # EG and OG2 tie at 20%
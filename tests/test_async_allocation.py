@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import pytest
+
+import allocation
+from tests.conftest import random_rows
+
+
+def test_async_assignment_matches_sync(make_snapshot_source, registry_for):
+    rows = random_rows(500)
+    sync_source = make_snapshot_source(rows)
+    allocation.StoreyAssignmentService(registry_for(sync_source), 0.6, sync_source).assign_elements(
+        sync_source.element_ids())
+
+    async_source = make_snapshot_source(rows)
+    service = allocation.StoreyAssignmentService(registry_for(async_source), 0.6, async_source)
+    asyncio.run(service.assign_elements_async(async_source.element_ids(), chunk_size=64))
+
+    assert async_source.assignments == sync_source.assignments
+
+
+def test_read_chunk_skips_unknown_elements(make_snapshot_source):
+    source = make_snapshot_source(random_rows(10))
+
+    async def read():
+        async with allocation.AsyncElementSource(source) as gateway:
+            return await gateway.read_chunk([1, 2, 12345, 3])
+
+    loaded, z_min, z_max = asyncio.run(read())
+    expected_min, expected_max = source.bbox_z_extents([1, 2, 3])
+    assert loaded == [1, 2, 3]
+    assert z_min.tolist() == expected_min.tolist() and z_max.tolist() == expected_max.tolist()
+
+
+def test_invalid_chunk_size_raises_value_error(make_snapshot_source, registry_for):
+    source = make_snapshot_source(random_rows(10))
+    service = allocation.StoreyAssignmentService(registry_for(source), 0.6, source)
+    with pytest.raises(ValueError, match="chunk_size"):
+        asyncio.run(service.assign_elements_async(source.element_ids(), chunk_size=0))
+
+
+def test_cancel_stops_writes_and_shuts_down_gateway(make_snapshot_source, registry_for, monkeypatch):
+    source = make_snapshot_source(random_rows(400))
+    bbox_z_extents = source.bbox_z_extents
+
+    def slow_bbox_z_extents(element_ids):
+        time.sleep(0.01)
+        return bbox_z_extents(element_ids)
+
+    monkeypatch.setattr(source, "bbox_z_extents", slow_bbox_z_extents)
+    gateways = []
+
+    class RecordingGateway(allocation.AsyncElementSource):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            gateways.append(self)
+
+    monkeypatch.setattr(allocation.storey_assignment_service, "AsyncElementSource", RecordingGateway)
+    service = allocation.StoreyAssignmentService(registry_for(source), 0.6, source)
+
+    async def run_and_cancel():
+        task = asyncio.create_task(service.assign_elements_async(source.element_ids(), chunk_size=10))
+        while not source.assignments:
+            await asyncio.sleep(0.005)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run_and_cancel())
+    written = len(source.assignments)
+    time.sleep(0.1)
+    assert 0 < written == len(source.assignments) < 400
+    with pytest.raises(RuntimeError, match="shutdown"):  # executor of the owned gateway is shut down
+        asyncio.run(gateways[0].call(time.sleep, 0))
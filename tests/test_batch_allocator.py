@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+import batch_allocator
+import capture
+from tests.conftest import STOREYS, random_rows
+
+
+@pytest.fixture
+def project_dir(tmp_path):
+    capture.write_element_snapshot(str(tmp_path / "a.snap"), random_rows(200), STOREYS)
+    (tmp_path / "notes.txt").write_text("not a project")
+    return tmp_path
+
+
+def test_lowercase_log_level_is_accepted(project_dir):
+    assert batch_allocator.main([str(project_dir), "--log-level", "info", "-j", "1"]) == 0
+    summary = json.loads((project_dir / "plans" / "summary.json").read_text())
+    assert summary["projects"] == 1 and summary["failed"] == {}
+    assert json.loads((project_dir / "plans" / "a.plan.json").read_text())["elements"] == 200
+
+
+def test_unknown_log_level_is_rejected(project_dir):
+    with pytest.raises(SystemExit):
+        batch_allocator.main([str(project_dir), "--log-level", "verbose"])
+
+
+def test_percentile_is_nearest_rank():
+    assert batch_allocator.percentile([], 50) == 0.0
+    assert batch_allocator.percentile([4.0, 1.0, 3.0, 2.0], 50) == 2.0
+    assert batch_allocator.percentile([4.0, 1.0, 3.0, 2.0], 95) == 4.0
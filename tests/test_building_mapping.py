@@ -0,0 +1,23 @@
+import allocation
+from allocation.model_tree_builder import ORPHANS_NAME
+from allocation.storey_assignment_service import map_model_element_trees_to_buildings
+from models.model_element import ElementKind
+from tests.conftest import snapshot_row
+
+
+def test_all_subtrees_of_a_building_are_kept(make_snapshot_source):
+    rows = [snapshot_row(1, 0.0, 3000.0, kind=ElementKind.WALL, group_key="G1", building="B1"),
+            snapshot_row(2, 0.0, 3000.0, kind=ElementKind.SLAB, group_key="G2", building="B1"),
+            snapshot_row(3, 0.0, 3000.0, kind=ElementKind.WALL, group_key="G3", building="B2"),
+            snapshot_row(4, 0.0, 3000.0, group_key="G1", building="B1"),
+            snapshot_row(5, 0.0, 3000.0, group_key="G9", building="B2")]
+    source = make_snapshot_source(rows)
+    builder = allocation.ModelElementTreeBuilder(source.element_ids(), source)
+    trees = builder.build()
+
+    by_ids = map_model_element_trees_to_buildings(trees, source, builder.element_ids_of(trees))
+    by_guids = map_model_element_trees_to_buildings(trees, source)
+
+    names = {building: [node.name for node in nodes] for building, nodes in by_ids.items()}
+    assert names == {"B1": ["E1", "E2"], "B2": ["E3"], "UnassignedBuilding": [ORPHANS_NAME]}
+    assert by_guids == by_ids
@@ -0,0 +1,112 @@
+import enum
+import sys
+from types import ModuleType
+
+import pytest
+
+from capture import CaptureReader, CaptureWriter, Point3D, ReplayBackend, SessionRecorder
+from capture.capture_file import CapturedEnum, decode_value, encode_call, encode_value
+from capture.recorder import CONTROLLER_MODULES
+
+
+class grouping(enum.Enum):
+    group = 0
+    subgroup = 1
+
+
+def roundtrip(value, enum_resolver=None):
+    out = bytearray()
+    encode_value(value, out)
+    decoded, offset = decode_value(bytes(out), 0, enum_resolver)
+    assert offset == len(out)
+    return decoded
+
+
+@pytest.mark.parametrize("value", [None, True, False, 0, -7, 2**40, 1.5, "", "Geschoss ü", [1, "a", [2.0, None]]])
+def test_encode_decode_roundtrip(value):
+    assert roundtrip(value) == value
+
+
+def test_points_and_enums_roundtrip():
+    point = roundtrip(Point3D(1.0, 2.5, -3.0))
+    assert (point.x, point.y, point.z) == (1.0, 2.5, -3.0)
+    assert roundtrip(grouping.subgroup) == CapturedEnum("grouping", "subgroup")
+    assert roundtrip(grouping.subgroup, lambda type_name, name: grouping[name]) is grouping.subgroup
+
+
+def test_writer_keeps_first_value_per_key(tmp_path):
+    path = str(tmp_path / "session.cap")
+    key = encode_call("element_controller", "get_element_cadwork_guid", (1,))
+    with CaptureWriter(path) as writer:
+        writer.write(key, "first")
+        writer.write(key, "second")
+    with CaptureReader(path) as reader:
+        assert len(reader) == 1
+        assert reader.lookup(key) == "first"
+
+
+def test_truncated_capture_keeps_complete_records(tmp_path):
+    path = tmp_path / "crashed.cap"
+    keys = [encode_call("element_controller", "get_element_cadwork_guid", (i,)) for i in range(3)]
+    with CaptureWriter(str(path)) as writer:
+        for i, key in enumerate(keys):
+            writer.write(key, f"guid-{i}")
+    path.write_bytes(path.read_bytes()[:-3])
+
+    with CaptureReader(str(path)) as reader:
+        assert len(reader) == 2
+        assert reader.lookup(keys[1]) == "guid-1"
+        assert keys[2] not in reader
+
+
+def test_not_a_capture(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"NOTACAPTURE")
+    with pytest.raises(ValueError):
+        CaptureReader(str(path))
+
+
+@pytest.fixture
+def controller_modules(monkeypatch):
+    """Stub controller modules; sys.modules entries are restored after the test."""
+    element_controller = ModuleType("element_controller")
+    element_controller.get_all_identifiable_element_ids = lambda: [1, 2]
+    element_controller.get_element_cadwork_guid = lambda eid: f"guid-{eid}"
+    element_controller.get_bounding_box_vertices_local = \
+        lambda eid, ref: [Point3D(0.0, 0.0, eid), Point3D(1.0, 1.0, eid + 1)]
+
+    bim_controller = ModuleType("bim_controller")
+    bim_controller.get_building = lambda eid: "B1"
+    bim_controller.set_building_and_storey = lambda ids, building, storey: None
+
+    monkeypatch.setitem(sys.modules, "cadwork", ModuleType("cadwork"))
+    for name in CONTROLLER_MODULES:
+        monkeypatch.setitem(sys.modules, name, ModuleType(name))
+    monkeypatch.setitem(sys.modules, "element_controller", element_controller)
+    monkeypatch.setitem(sys.modules, "bim_controller", bim_controller)
+
+
+def test_recorded_session_replays(tmp_path, controller_modules):
+    path = str(tmp_path / "session.cap")
+    with SessionRecorder(path):
+        ec = sys.modules["element_controller"]
+        bc = sys.modules["bim_controller"]
+        ids = ec.get_all_identifiable_element_ids()
+        guids = [ec.get_element_cadwork_guid(eid) for eid in ids]
+        bbox = ec.get_bounding_box_vertices_local(2, [])
+        buildings = [bc.get_building(eid) for eid in ids]
+
+    with ReplayBackend(path) as backend:
+        ec = sys.modules["element_controller"]
+        bc = sys.modules["bim_controller"]
+        assert ec.get_all_identifiable_element_ids() == ids
+        assert [ec.get_element_cadwork_guid(eid) for eid in ids] == guids
+        replayed_bbox = ec.get_bounding_box_vertices_local(2, [])
+        assert [(p.x, p.y, p.z) for p in replayed_bbox] == [(p.x, p.y, p.z) for p in bbox]
+        assert [bc.get_building(eid) for eid in ids] == buildings
+
+        bc.set_building_and_storey([1, 2], "B1", "EG")
+        assert backend.writes == [("bim_controller", "set_building_and_storey", ([1, 2], "B1", "EG"))]
+
+        with pytest.raises(LookupError):
+            ec.get_element_cadwork_guid(3)
@@ -0,0 +1,38 @@
+import pytest
+
+import allocation
+import capture
+from allocation.memory_profiler import (DEFAULT_BUDGETS, STAGE_ASSIGNMENT, STAGE_ELEMENT_CREATION,
+                                        STAGE_TREE_BUILDING, MemoryBudget, MemoryBudgetExceeded)
+from tests.conftest import STOREYS, random_rows
+
+ELEMENT_COUNT = 1000
+
+
+@pytest.fixture(scope="module")
+def memory_report(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("memory") / "snapshot.bin")
+    capture.write_element_snapshot(path, random_rows(ELEMENT_COUNT), STOREYS)
+    with capture.load_element_snapshot(path) as snapshot:
+        source = allocation.SnapshotElementSource(snapshot)
+        registry = allocation.BuildingRegistry()
+        for building in source.buildings().values():
+            registry.upsert(building)
+        return allocation.profile_allocation(registry, source.element_ids(), source)
+
+
+def test_stages_stay_within_default_budgets(memory_report):
+    assert memory_report.element_count == ELEMENT_COUNT
+    assert [s.name for s in memory_report.stages] == [STAGE_TREE_BUILDING, STAGE_ELEMENT_CREATION, STAGE_ASSIGNMENT]
+    memory_report.check_budgets(DEFAULT_BUDGETS)
+
+
+def test_element_creation_tracks_geometry_objects(memory_report):
+    created = memory_report.stage(STAGE_ELEMENT_CREATION).by_type
+    assert created["ModelElementGeometry"].count == ELEMENT_COUNT
+    assert created["Guid"].count == ELEMENT_COUNT
+
+
+def test_budget_too_low_raises(memory_report):
+    with pytest.raises(MemoryBudgetExceeded, match=STAGE_ELEMENT_CREATION):
+        memory_report.check_budgets([MemoryBudget(STAGE_ELEMENT_CREATION, 16)])
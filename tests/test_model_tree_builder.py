@@ -0,0 +1,79 @@
+import dataclasses
+
+import allocation
+import models
+from allocation.model_tree_builder import ORPHANS_NAME
+from models.model_element import ElementKind
+from tests.conftest import random_rows, snapshot_row
+
+
+def subtree_roots(trees):
+    return {node.guid.value: node for node in trees}
+
+
+def test_rebuild_reuses_unchanged_subtrees(make_snapshot_source):
+    source = make_snapshot_source(random_rows(300))
+    builder = allocation.ModelElementTreeBuilder(source.element_ids(), source)
+    before = subtree_roots(builder.build())
+
+    after = subtree_roots(builder.rebuild(changed_ids=[100]))  # element 100 is a wall
+    wall_guid = source.guid(100)
+    assert after.keys() == before.keys()
+    assert after[wall_guid] is not before[wall_guid]
+    # only the changed wall and the synthetic orphans container are new objects
+    orphans_guid = models.derive_guid(ORPHANS_NAME).value
+    assert {g for g in before if after[g] is not before[g]} == {wall_guid, orphans_guid}
+
+
+def test_parent_turned_leaf_leaves_no_stale_subtree(make_snapshot_source, monkeypatch):
+    source = make_snapshot_source(random_rows(300))
+    builder = allocation.ModelElementTreeBuilder(source.element_ids(), source)
+    trees = builder.build()
+    wall = subtree_roots(trees)[source.guid(100)]
+    assert builder.element_ids_of([wall]) == [100]
+
+    kind = source.kind
+    monkeypatch.setattr(source, "kind", lambda eid: ElementKind.LEAF if eid == 100 else kind(eid))
+    rebuilt = builder.rebuild(changed_ids=[100])
+
+    assert source.guid(100) not in subtree_roots(rebuilt)
+    assert builder.element_ids_of([wall]) == [None]
+
+
+def test_loaded_index_reclassifies_elements_with_other_guids(make_snapshot_source, tmp_path):
+    rows = random_rows(120)
+    first = make_snapshot_source(rows)
+    builder = allocation.ModelElementTreeBuilder(first.element_ids(), first)
+    builder.build()
+    path = str(tmp_path / "index.json")
+    builder.index.save(path)
+
+    # Next session: id 100 now belongs to a different element, a leaf
+    rows[99] = dataclasses.replace(rows[99], guid="ffffffff-0000-0000-0000-000000000100", kind=ElementKind.LEAF.value)
+    second = make_snapshot_source(rows)
+    index = allocation.ModelTreeIndex.load(path)
+    assert index.is_parent(100)
+
+    trees = allocation.ModelElementTreeBuilder(second.element_ids(), second, index).build()
+    assert not index.is_parent(100)
+    assert index.guid(100) == second.guid(100)
+    assert second.guid(100) not in subtree_roots(trees)
+
+
+def test_loaded_index_with_deleted_parent_keeps_its_leaves(make_snapshot_source, tmp_path):
+    rows = [snapshot_row(1, 0.0, 3000.0, kind=ElementKind.WALL, group_key="G"),
+            snapshot_row(2, 0.0, 3000.0, group_key="G"),
+            snapshot_row(3, 0.0, 3000.0, group_key="H")]
+    source = make_snapshot_source(rows)
+    builder = allocation.ModelElementTreeBuilder([1, 2, 3], source)
+    builder.build()
+    path = str(tmp_path / "index.json")
+    builder.index.save(path)
+
+    def leaf_names(trees):
+        return sorted(leaf.name for node in trees for leaf in node.children)
+
+    # wall 1 was deleted before the next session
+    fresh = allocation.ModelElementTreeBuilder([2, 3], source).build()
+    loaded = allocation.ModelElementTreeBuilder([2, 3], source, allocation.ModelTreeIndex.load(path)).build()
+    assert leaf_names(loaded) == leaf_names(fresh) == ["E2", "E3"]
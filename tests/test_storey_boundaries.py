@@ -0,0 +1,114 @@
+import math
+
+import numpy as np
+import pytest
+from compas.geometry import Point
+
+import allocation
+import models
+from allocation import Building, BuildingStorey, BuildingStoreyBoundaryCreator
+from models.building_storey_boundary import DEFAULT_Z_TOLERANCE
+from tests.conftest import snapshot_row
+
+NOISE = 0.5 * DEFAULT_Z_TOLERANCE
+
+
+@pytest.fixture
+def boundaries() -> list[models.BuildingStoreyBoundary]:
+    building = Building("B1", [BuildingStorey("B1", "OG1", 3000.0), BuildingStorey("B1", "EG", 0.0),
+                               BuildingStorey("B1", "OG2", 6000.0)])
+    return BuildingStoreyBoundaryCreator.from_building(building)
+
+
+@pytest.fixture
+def index(boundaries) -> models.StoreyIntervalIndex:
+    return models.StoreyIntervalIndex(boundaries)
+
+
+def test_from_building_creates_one_boundary_per_storey(boundaries):
+    assert [b.storey_name for b in boundaries] == ["EG", "OG1", "OG2"]
+    assert [b.identifier for b in boundaries] == ["B1_EG", "B1_OG1", "B1_OG2"]
+    assert [b.z_range() for b in boundaries] == [(0.0, 3000.0), (3000.0, 6000.0), (6000.0, math.inf)]
+
+
+def test_flat_plate_on_elevation_belongs_to_storey_above(boundaries):
+    eg, og1, og2 = boundaries
+    assert (eg.coverage(3000.0, 3000.0), og1.coverage(3000.0, 3000.0)) == (0.0, 1.0)
+    # within tolerance of the elevation, also when it is noisy
+    assert og1.coverage(3000.0 - NOISE, 3000.0 + NOISE) == 1.0
+    assert eg.coverage(3000.0 - NOISE, 3000.0 - NOISE) == 0.0
+    assert og2.coverage(7000.0, 7000.0) == 1.0
+
+
+def test_bottom_inclusive_top_exclusive(boundaries):
+    eg, og1, _ = boundaries
+    assert eg.contains_z(0.0) and not eg.contains_z(3000.0)
+    assert og1.contains_z(3000.0) and og1.contains_z(3000.0 - NOISE)
+    assert not og1.contains_z(6000.0)
+
+
+def test_noise_within_tolerance_adds_no_overlap(boundaries):
+    eg, og1, _ = boundaries
+    # a wall of EG whose top pokes a hair into OG1
+    assert eg.coverage(0.0, 3000.0 + NOISE) == 1.0
+    assert og1.coverage(0.0, 3000.0 + NOISE) == 0.0
+    # beyond the tolerance the overlap counts
+    assert og1.coverage(0.0, 3000.0 + 1.0) > 0.0
+
+
+def test_open_top_boundary_covers_elements_above_highest_elevation(boundaries):
+    eg, og1, og2 = boundaries
+    assert og2.coverage(8000.0, 9000.0) == 1.0
+    assert og2.coverage(5000.0, 7000.0) == 0.5
+    assert eg.coverage(8000.0, 9000.0) == og1.coverage(8000.0, 9000.0) == 0.0
+
+
+def test_index_snap_and_locate(index):
+    z = np.array([-1.0, 0.0 + NOISE, 2999.0, 3000.0 - NOISE, 6000.0, 1e9])
+    snapped = index.snap(z)
+    assert snapped.tolist() == [-1.0, 0.0, 2999.0, 3000.0, 6000.0, 1e9]
+    assert index.locate(snapped).tolist() == [-1, 0, 0, 1, 2, 2]
+
+
+def test_index_coverage_matches_boundaries(index, boundaries):
+    rng = np.random.default_rng(7)
+    z_min = rng.choice([0.0, 3000.0, 6000.0, -500.0, 2999.0], 200) + rng.choice([0.0, NOISE, -NOISE, 100.0], 200)
+    z_max = z_min + rng.choice([0.0, NOISE, 200.0, 3000.0, 5000.0], 200)
+    coverage = index.coverage(z_min, z_max)
+    expected = [[b.coverage(lo, hi) for b in boundaries] for lo, hi in zip(z_min.tolist(), z_max.tolist())]
+    np.testing.assert_allclose(coverage, expected)
+    assert index.is_flat(z_min, z_min + NOISE).all()
+
+
+def test_service_assigns_flat_and_top_elements(make_snapshot_source, registry_for):
+    rows = [snapshot_row(1, 3000.0, 0.0), snapshot_row(2, 9000.0, 2000.0), snapshot_row(3, 0.0, 3000.0 + NOISE)]
+    source = make_snapshot_source(rows, {"B1": [("EG", 0.0), ("OG1", 3000.0), ("OG2", 6000.0)]})
+    allocation.StoreyAssignmentService(registry_for(source), 0.6, source).assign_elements(source.element_ids())
+    assert source.assignments == {1: ("B1", "OG1"), 2: ("B1", "OG2"), 3: ("B1", "EG")}
+
+
+def corners_of(z_min: float, z_max: float) -> list[list[float]]:
+    return [[x, y, z] for z in (z_min, z_max) for x, y in ((0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0))]
+
+
+def test_array_predicates_match_scalar(boundaries):
+    extents = [(0.0, 3000.0), (3000.0, 3000.0), (3000.0 - NOISE, 3000.0 + NOISE), (-NOISE, 3000.0 + NOISE),
+               (2000.0, 4000.0), (5000.0, 7000.0), (8000.0, 9000.0), (7000.0, 7000.0), (-500.0, -100.0)]
+    z_min, z_max = np.array(extents).T
+    corners = np.array([corners_of(lo, hi) for lo, hi in extents])
+    for boundary in boundaries:
+        points = [[Point(*c) for c in element] for element in corners.tolist()]
+        np.testing.assert_allclose(boundary.coverage_array(z_min, z_max),
+                                   [boundary.coverage(lo, hi) for lo, hi in extents])
+        assert boundary.contains_bbox_fully_array(corners).tolist() == [
+            boundary.contains_bbox_fully(p) for p in points]
+        for fraction in (0.0, 0.5, 1.0):
+            assert boundary.contains_bbox_fraction_array(corners, fraction).tolist() == [
+                boundary.contains_bbox_fraction(p, fraction) for p in points]
+
+
+def test_array_predicates_reject_wrong_shape(boundaries):
+    with pytest.raises(ValueError, match="8, 3"):
+        boundaries[0].contains_bbox_fully_array(np.zeros((2, 4, 3)))
+    with pytest.raises(ValueError, match="8, 3"):
+        boundaries[0].contains_bbox_fraction_array(np.zeros((8, 3)), 0.5)
@@ -0,0 +1,150 @@
+import time
+
+import pytest
+
+import allocation
+from tests.conftest import random_rows
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_debouncer_waits_for_quiet_period():
+    clock = FakeClock()
+    debouncer = allocation.Debouncer(quiet_period=0.05, max_delay=0.25, clock=clock)
+    debouncer.add([2, 1])
+    clock.now = 0.04
+    debouncer.add([3])
+    clock.now = 0.08
+    assert debouncer.take() == []
+    clock.now = 0.09
+    assert debouncer.take() == [1, 2, 3]
+    assert len(debouncer) == 0
+
+
+def test_debouncer_max_delay_bounds_continuous_edits():
+    clock = FakeClock()
+    debouncer = allocation.Debouncer(quiet_period=0.05, max_delay=0.25, clock=clock)
+    batches = []
+    for i in range(20):  # an edit every 30 ms never leaves a quiet period
+        clock.now = i * 0.03
+        debouncer.add([i])
+        batches.append(debouncer.take())
+    # due 0.25 s after the first edit of each batch, taking the edit of that step along
+    assert [b for b in batches if b] == [list(range(10)), list(range(10, 20))]
+
+
+def test_debouncer_rejects_max_delay_below_quiet_period():
+    with pytest.raises(ValueError):
+        allocation.Debouncer(quiet_period=0.5, max_delay=0.1)
+
+
+def test_fake_event_source_drains_on_poll():
+    events = allocation.FakeElementEventSource()
+    events.emit([1, 2])
+    events.emit([2, 3])
+    assert events.poll() == {1, 2, 3}
+    assert events.poll() == set()
+
+
+@pytest.fixture
+def watched(make_snapshot_source, registry_for):
+    rows = random_rows(300)
+    reference = make_snapshot_source(rows)
+    allocation.StoreyAssignmentService(registry_for(reference), 0.6, reference).assign_elements(
+        reference.element_ids())
+    source = make_snapshot_source(rows)
+    return source, registry_for(source), reference.assignments
+
+
+def test_step_reallocates_debounced_batch(watched):
+    source, registry, expected = watched
+    events = allocation.FakeElementEventSource()
+    clock = FakeClock()
+    watcher = allocation.StoreyWatcher(registry, events, source,
+                                       debouncer=allocation.Debouncer(0.05, 0.25, clock=clock))
+
+    events.emit(range(1, 101))
+    assert watcher.step() is None
+    clock.now = 0.03
+    events.emit(range(101, 151))
+    assert watcher.step() is None
+    assert source.assignments == {}
+
+    clock.now = 0.09
+    batch = watcher.step()
+    assert batch.elements == 150
+    assert batch.assigned == sum(1 for eid in range(1, 151) if eid in expected)
+    assert source.assignments == {eid: expected[eid] for eid in range(1, 151) if eid in expected}
+    assert batch.seconds < allocation.storey_watcher.LATENCY_BUDGET
+
+
+def test_flush_skips_debouncing_and_unknown_elements(watched):
+    source, registry, expected = watched
+    events = allocation.FakeElementEventSource()
+    watcher = allocation.StoreyWatcher(registry, events, source,
+                                       debouncer=allocation.Debouncer(clock=FakeClock()))
+    events.emit([1, 2, 987654])
+    batch = watcher.step(flush=True)
+    assert batch.elements == 3
+    assert set(source.assignments) == {eid for eid in (1, 2) if eid in expected}
+
+
+def test_batch_latency_includes_poll_time(watched):
+    source, registry, _ = watched
+
+    class SlowEvents(allocation.IElementEventSource):
+        def poll(self) -> set[int]:
+            time.sleep(0.02)
+            return {1}
+
+    watcher = allocation.StoreyWatcher(registry, SlowEvents(), source,
+                                       debouncer=allocation.Debouncer(clock=FakeClock()))
+    batch = watcher.step(flush=True)
+    assert batch.poll_seconds >= 0.02
+    assert batch.seconds >= batch.poll_seconds
+    assert watcher.stats.polls == 1 and watcher.stats.max_poll_seconds >= 0.02
+
+
+def test_polling_source_scans_at_most_every_scan_interval(watched, monkeypatch):
+    source, _, _ = watched
+    clock = FakeClock()
+    scans = []
+    bbox_z_extents = source.bbox_z_extents
+
+    def counting(element_ids):
+        scans.append(len(element_ids))
+        z_min, z_max = bbox_z_extents(element_ids)
+        if 7 in element_ids and len(scans) > 1:
+            z_max = z_max.copy()
+            z_max[list(element_ids).index(7)] += 100.0
+        return z_min, z_max
+
+    monkeypatch.setattr(source, "bbox_z_extents", counting)
+    ids = [eid for eid in source.element_ids() if eid != 300]
+    polling = allocation.PollingElementEventSource(source, lambda: ids, scan_interval=2.0, clock=clock)
+    assert polling.poll() == set()  # baseline
+    ids.append(300)  # added
+    ids.remove(5)  # deleted
+    clock.now = 1.0
+    assert polling.poll() == set()
+    assert len(scans) == 1
+    clock.now = 2.0
+    assert polling.poll() == {7, 300}
+    assert len(scans) == 2
+
+
+def test_polling_source_forgets_unreadable_elements(watched):
+    source, registry, _ = watched
+    ids = [1, 2, 3]
+    polling = allocation.PollingElementEventSource(source, lambda: ids, scan_interval=0.0)
+    watcher = allocation.StoreyWatcher(registry, polling, source, debouncer=allocation.Debouncer(clock=FakeClock()))
+    assert watcher.step() is None  # baseline
+    ids.append(999)  # listed by the model but its extents cannot be read
+    assert watcher.step(flush=True) is None
+    assert polling.poll() == set()
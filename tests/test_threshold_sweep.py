@@ -0,0 +1,35 @@
+import allocation
+from tests.conftest import STOREYS, random_rows, snapshot_row
+
+
+def sweep_for(make_snapshot_source, registry_for, rows):
+    source = make_snapshot_source(rows, {"B1": STOREYS["B1"]})
+    return allocation.CoverageSweep(registry_for(source), source.element_ids(), source)
+
+
+def test_newly_assigned_elements_are_added_not_moved(make_snapshot_source, registry_for):
+    rows = [snapshot_row(1, 0.0, 2800.0, storey=None),
+            snapshot_row(2, 3000.0, 2800.0, storey="OG1"),
+            snapshot_row(3, 3000.0, 2800.0, storey="EG")]
+    outcome = sweep_for(make_snapshot_source, registry_for, rows).evaluate(0.6)
+    assert (outcome.assigned, outcome.added, outcome.moved, outcome.dropped) == (3, 1, 1, 0)
+
+
+def test_nothing_moves_when_nothing_is_assigned_today(make_snapshot_source, registry_for):
+    rows = [snapshot_row(eid, 3000.0 * (eid % 3), 2800.0, storey=None) for eid in range(1, 10)]
+    outcome = sweep_for(make_snapshot_source, registry_for, rows).evaluate(0.6)
+    assert (outcome.assigned, outcome.added, outcome.moved) == (9, 9, 0)
+
+
+def test_dropped_elements(make_snapshot_source, registry_for):
+    rows = [snapshot_row(1, 1500.0, 3000.0, storey="EG")]  # half in EG, half in OG1
+    outcome = sweep_for(make_snapshot_source, registry_for, rows).evaluate(0.6)
+    assert (outcome.assigned, outcome.unassigned, outcome.dropped) == (0, 1, 1)
+
+
+def test_sweep_matches_assignment_service(make_snapshot_source, registry_for):
+    source = make_snapshot_source(random_rows(300))
+    registry = registry_for(source)
+    decisions = allocation.CoverageSweep(registry, source.element_ids(), source).decisions(0.6)
+    allocation.StoreyAssignmentService(registry, 0.6, source).assign_elements(source.element_ids())
+    assert decisions == [source.assignments.get(eid) for eid in source.element_ids()]